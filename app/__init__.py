@@ -1,31 +1,100 @@
 import atexit
+import hmac
 import os
 import secrets
 import logging
 from datetime import datetime
 
+import orjson
 from flask import Flask, abort, request, session, render_template
 from markupsafe import Markup, escape
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 
-from .extensions import cache
-from .helpers import start_block_watcher, stop_block_watcher
-from .models import db
+from .extensions import ORJSONProvider, cache
+from .models import db, ensure_schema, set_sqlite_pragmas
+
+
+def _orjson_dumps_str(obj) -> str:
+    return orjson.dumps(obj).decode()
+
+
+def get_database_url() -> str:
+    """Return the configured SQLAlchemy database URL without building the app."""
+    return os.environ.get("DATABASE_URL", "sqlite:///app.db")
+
+
+def get_hive_nodes() -> str:
+    """Return the configured Hive RPC nodes without building the app."""
+    return os.environ.get("HIVE_NODES", "").strip()
 
 
 def create_app():
     app = Flask(__name__)
+    app.json = ORJSONProvider(app)
     # Use environment secret; fallback to a random token for safety
     app.config["SECRET_KEY"] = os.environ.get("FLASK_SECRET_KEY") or secrets.token_hex(
         32
     )
 
     # Database & Cache config
-    app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get(
-        "DATABASE_URL", "sqlite:///app.db"
-    )
+    app.config["SQLALCHEMY_DATABASE_URI"] = get_database_url()
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-    app.config.setdefault("CACHE_TYPE", "SimpleCache")
-    app.config.setdefault("CACHE_DEFAULT_TIMEOUT", 60)
+    # Engine tuning: batch multi-row INSERTs (bulk ingest, backfills)
+    try:
+        page_size = int(os.environ.get("HIVE_MICRO_INSERT_PAGE_SIZE", "10000"))
+    except Exception:
+        page_size = 10000
+    engine_opts = {
+        "insertmanyvalues_page_size": max(1, page_size),
+        # JSON columns (mentions/tags/raw_json) encode/decode via orjson
+        "json_serializer": _orjson_dumps_str,
+        "json_deserializer": orjson.loads,
+    }
+    try:
+        db_url = make_url(app.config["SQLALCHEMY_DATABASE_URI"])
+        if db_url.get_backend_name() == "postgresql" and (
+            db_url.get_driver_name() == "psycopg2"
+        ):
+            # Use execute_values() pages plus execute_batch() for UPDATE/DELETE
+            engine_opts["executemany_mode"] = "values_plus_batch"
+    except Exception:
+        pass
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_opts
+    # SQLite: WAL journal + relaxed sync (see models.SQLITE_PRAGMAS)
+    app.config["SQLITE_PRAGMAS"] = os.environ.get("HIVE_MICRO_SQLITE_PRAGMAS", "1") in (
+        "1",
+        "true",
+        "yes",
+        "on",
+    )
+    # Reconcile the schema at startup; turn off for workers when a deploy step
+    # (or one process started with it on) already brought the schema up to date
+    app.config["AUTO_SCHEMA"] = os.environ.get("HIVE_MICRO_AUTO_SCHEMA", "1") in (
+        "1",
+        "true",
+        "yes",
+        "on",
+    )
+    # Postgres: skip the WAL flush wait when committing schema bootstrap DDL
+    app.config["FAST_DDL"] = os.environ.get("HIVE_MICRO_FAST_DDL", "0") in (
+        "1",
+        "true",
+        "yes",
+        "on",
+    )
+    # Cache backend; e.g. CACHE_TYPE=RedisCache + CACHE_REDIS_URL lets gunicorn
+    # workers share following lists and cached responses (needs `redis`)
+    app.config["CACHE_TYPE"] = os.environ.get("CACHE_TYPE", "SimpleCache")
+    try:
+        app.config["CACHE_DEFAULT_TIMEOUT"] = int(
+            os.environ.get("CACHE_DEFAULT_TIMEOUT", "60")
+        )
+    except Exception:
+        app.config["CACHE_DEFAULT_TIMEOUT"] = 60
+    redis_url = os.environ.get("CACHE_REDIS_URL", "").strip()
+    if redis_url:
+        app.config["CACHE_REDIS_URL"] = redis_url
     # Security settings
     app.config.setdefault("SESSION_COOKIE_SAMESITE", "Lax")
     app.config.setdefault("SESSION_COOKIE_SECURE", False)
@@ -58,7 +127,10 @@ def create_app():
         app.config["CONTENT_MAX_LEN"] = 512
     # Moderation config
     mods = os.environ.get("HIVE_MICRO_MODERATORS", "").strip()
-    app.config["MODERATORS"] = [u.strip().lower() for u in mods.split(",") if u.strip()]
+    # frozenset: checked with `in` on every moderation-aware request
+    app.config["MODERATORS"] = frozenset(
+        u.strip().lower() for u in mods.split(",") if u.strip()
+    )
     try:
         app.config["MOD_QUORUM"] = int(os.environ.get("HIVE_MICRO_MOD_QUORUM", "1"))
     except Exception:
@@ -89,6 +161,14 @@ def create_app():
         "HIVE_MICRO_YOUTUBE_PREVIEW", "0"
     ) in ("1", "true", "yes", "on")
 
+    # Seconds to cache each user's following list fetched from chain
+    try:
+        app.config["FOLLOWING_CACHE_TTL"] = int(
+            os.environ.get("HIVE_MICRO_FOLLOWING_TTL", "300")
+        )
+    except Exception:
+        app.config["FOLLOWING_CACHE_TTL"] = 300
+
     # Watcher tuning
     app.config["WATCHER_SINGLE_SLEEP_SEC"] = float(
         os.environ.get("HIVE_MICRO_SINGLE_SLEEP_SEC", "2.5")
@@ -109,23 +189,51 @@ def create_app():
     )
 
     # Initialize Hive instance with optional custom nodes
-    app.config["HIVE_NODES"] = os.environ.get("HIVE_NODES", "").strip()
+    app.config["HIVE_NODES"] = get_hive_nodes()
 
-    # Blueprints: API and UI kept separate for modularity
-    from .api import api_bp
-    from .ui import ui_bp
+    # Blueprints: API and UI kept separate for modularity.
+    # Headless processes (e.g. the watcher sidecar) can skip them entirely.
+    if os.environ.get("HIVE_MICRO_SKIP_BLUEPRINTS", "0") not in (
+        "1",
+        "true",
+        "yes",
+        "on",
+    ):
+        from .api import api_bp
+        from .ui import ui_bp
 
-    app.register_blueprint(api_bp, url_prefix="/api/v1")
-    app.register_blueprint(ui_bp)
+        app.register_blueprint(api_bp, url_prefix="/api/v1")
+        app.register_blueprint(ui_bp)
 
     with app.app_context():
-        db.create_all()
+        if db.engine.dialect.name == "sqlite" and app.config["SQLITE_PRAGMAS"]:
+            event.listen(db.engine, "connect", set_sqlite_pragmas)
+        if app.config["AUTO_SCHEMA"]:
+            ensure_schema()
 
     # --- CSRF token setup and validation ---
     @app.before_request
-    def _ensure_csrf_token():
+    def _csrf_before_request():
+        # One hook per request: mint the session token, then validate writes
         if "csrf_token" not in session:
             session["csrf_token"] = secrets.token_urlsafe(32)
+        if request.method in (
+            "POST",
+            "PUT",
+            "PATCH",
+            "DELETE",
+        ) and request.path.startswith("/api/v1/"):
+            hdr = request.headers.get("X-CSRF-Token", "")
+            cky = request.cookies.get("XSRF-TOKEN", "")
+            tok = session.get("csrf_token", "")
+            # Constant-time compares; bytes so non-ASCII input cannot raise
+            tok_b = tok.encode()
+            if not (
+                tok
+                and hmac.compare_digest(hdr.encode(), tok_b)
+                and hmac.compare_digest(cky.encode(), tok_b)
+            ):
+                return abort(403)
 
     @app.after_request
     def _set_csrf_cookie(resp):
@@ -141,28 +249,19 @@ def create_app():
         )
         return resp
 
-    @app.before_request
-    def _csrf_protect():
-        if request.method in (
-            "POST",
-            "PUT",
-            "PATCH",
-            "DELETE",
-        ) and request.path.startswith("/api/v1/"):
-            hdr = request.headers.get("X-CSRF-Token", "")
-            cky = request.cookies.get("XSRF-TOKEN", "")
-            tok = session.get("csrf_token", "")
-            if not tok or hdr != tok or cky != tok:
-                return abort(403)
+    # Start watcher only once (avoid duplicate threads under Flask reloader).
+    # The ingestion helpers (Hive client, Markdown, Bleach) are imported only when
+    # the watcher is enabled, so `import app.models` stays light for tools.
+    if os.environ.get("HIVE_MICRO_WATCHER", "1") == "1":
+        from .helpers import start_block_watcher, stop_block_watcher
 
-    # Start watcher only once (avoid duplicate threads under Flask reloader)
-    try:
-        is_reloader_child = os.environ.get("WERKZEUG_RUN_MAIN") == "true"
-    except Exception:
-        is_reloader_child = True
-    if not app.debug or is_reloader_child:
-        start_block_watcher(app)
-    atexit.register(stop_block_watcher)
+        try:
+            is_reloader_child = os.environ.get("WERKZEUG_RUN_MAIN") == "true"
+        except Exception:
+            is_reloader_child = True
+        if not app.debug or is_reloader_child:
+            start_block_watcher(app)
+        atexit.register(stop_block_watcher)
 
     # --- Jinja Filters ---
     @app.template_filter("tolocaltime")
@@ -1,20 +1,42 @@
-import json
-from datetime import datetime, timezone
-
-from flask import Blueprint, current_app, jsonify, request, session
+import heapq
+import time
+from datetime import datetime
+from itertools import islice
+
+from flask import (
+    Blueprint,
+    current_app,
+    jsonify,
+    request,
+    session,
+    stream_with_context,
+)
+from sqlalchemy.exc import IntegrityError
 
+from .extensions import cache
 from .helpers import (
+    _MESSAGE_COLS,
+    _USERNAME_RE,
+    _following_cache_key,
+    _insert_ignoring_duplicates,
     _get_following_usernames,
+    _heart_maps,
+    _not_hidden,
     _parse_login_payload,
     _parse_timestamp,
+    _update_cached_following,
+    _upsert_moderation,
+    _utcnow_naive,
     _verify_signature_and_key,
-    markdown_render,
+    message_html,
 )
 from .models import (
     Checkpoint,
     MentionState,
     ModerationState,
     Message,
+    MessageMention,
+    MessageTag,
     Moderation,
     ModerationAction,
     Appreciation,
@@ -24,15 +46,204 @@ from .models import (
 api_bp = Blueprint("api", __name__)
 
 
-def _hidden_trx_subquery():
-    return db.session.query(Moderation.trx_id).filter(Moderation.visibility == "hidden")
+def _preview_cols(max_len: int):
+    """_MESSAGE_COLS with content cut down to max_len + 1 characters in SQL.
+
+    List endpoints only show the first max_len characters; the extra one lets
+    message_html() still tell that the text was truncated.
+    """
+    content = db.func.substr(Message.content, 1, max_len + 1).label("content")
+    return tuple(content if c is Message.content else c for c in _MESSAGE_COLS)
+
+
+# Moderation queue/audit items only show these; skip html, mentions, etc.
+_MOD_ITEM_COLS = (
+    Message.trx_id,
+    Message.timestamp,
+    Message.author,
+    Message.content,
+    Message.tags,
+)
+
+
+def _moderation_map(trx_ids) -> dict[str, Moderation]:
+    """Moderation rows for the given trx_ids in one IN query, keyed by trx_id."""
+    if not trx_ids:
+        return {}
+    rows = Moderation.query.filter(Moderation.trx_id.in_(set(trx_ids))).all()
+    return {mod.trx_id: mod for mod in rows}
 
 
-def _utcnow_naive() -> datetime:
-    return datetime.now(timezone.utc).replace(tzinfo=None)
+def _mod_item_messages(trx_ids) -> dict:
+    """Message rows for moderation queue/audit items, loaded in one IN query."""
+    if not trx_ids:
+        return {}
+    rows = (
+        db.session.query(*_MOD_ITEM_COLS).filter(Message.trx_id.in_(set(trx_ids))).all()
+    )
+    return {m.trx_id: m for m in rows}
+
+
+def _hidden_page(cursor: str | None, limit: int) -> list[Moderation]:
+    """Hidden posts after the cursor in (mod_at desc, trx_id desc) order.
+
+    Every hide stamps mod_at; a row without one has no place in the order.
+    """
+    q = Moderation.query.filter(
+        Moderation.visibility == "hidden", Moderation.mod_at.isnot(None)
+    )
+    q = _apply_cursor(q, cursor, Moderation.mod_at, Moderation.trx_id, key_type=str)
+    return (
+        q.order_by(Moderation.mod_at.desc(), Moderation.trx_id.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def _pending_candidates(cursor: str | None, limit: int, quorum: int):
+    """Posts waiting on hide quorum, by their latest hide, newest first.
+
+    Rows carry trx_id, created_at (the latest hide), cutoff (the last unhide,
+    or None) and approvals (distinct moderators hiding since that unhide).
+    Grouping per trx_id gives each post one key, so a post never comes back
+    on a later page through one of its older hide actions.
+    """
+    last_unhide = (
+        db.session.query(
+            ModerationAction.trx_id.label("trx_id"),
+            db.func.max(ModerationAction.created_at).label("cutoff"),
+        )
+        .filter(ModerationAction.action == "unhide")
+        .group_by(ModerationAction.trx_id)
+        .subquery()
+    )
+    pending = (
+        db.session.query(
+            ModerationAction.trx_id.label("trx_id"),
+            db.func.max(ModerationAction.created_at).label("created_at"),
+            db.func.max(last_unhide.c.cutoff).label("cutoff"),
+            db.func.count(db.distinct(ModerationAction.moderator)).label("approvals"),
+        )
+        .outerjoin(last_unhide, last_unhide.c.trx_id == ModerationAction.trx_id)
+        .filter(
+            ModerationAction.action == "hide",
+            db.or_(
+                last_unhide.c.cutoff.is_(None),
+                ModerationAction.created_at > last_unhide.c.cutoff,
+            ),
+            ~db.exists().where(
+                Moderation.trx_id == ModerationAction.trx_id,
+                Moderation.visibility == "hidden",
+            ),
+        )
+        .group_by(ModerationAction.trx_id)
+        .having(db.func.count(db.distinct(ModerationAction.moderator)) < quorum)
+        .subquery()
+    )
+    q = db.session.query(pending)
+    q = _apply_cursor(q, cursor, pending.c.created_at, pending.c.trx_id, key_type=str)
+    return (
+        q.order_by(pending.c.created_at.desc(), pending.c.trx_id.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def _hides_since_unhide(trx_ids) -> dict[str, list[ModerationAction]]:
+    """Hide actions after each trx_id's last unhide, newest first.
+
+    One query over the items' moderation history replaces the per-item
+    hide-history lookups; both the per-trx_id last unhide and the hides after
+    it are read from ix_moderation_actions_trx_action_created.
+    """
+    if not trx_ids:
+        return {}
+    trx_ids = set(trx_ids)
+    last_unhide = (
+        db.session.query(
+            ModerationAction.trx_id,
+            db.func.max(ModerationAction.created_at).label("cutoff"),
+        )
+        .filter(
+            ModerationAction.trx_id.in_(trx_ids),
+            ModerationAction.action == "unhide",
+        )
+        .group_by(ModerationAction.trx_id)
+        .subquery()
+    )
+    rows = (
+        ModerationAction.query.outerjoin(
+            last_unhide, last_unhide.c.trx_id == ModerationAction.trx_id
+        )
+        .filter(
+            ModerationAction.trx_id.in_(trx_ids),
+            ModerationAction.action == "hide",
+            db.or_(
+                last_unhide.c.cutoff.is_(None),
+                ModerationAction.created_at > last_unhide.c.cutoff,
+            ),
+        )
+        .order_by(ModerationAction.created_at.desc(), ModerationAction.id.desc())
+        .all()
+    )
+    hides: dict[str, list[ModerationAction]] = {}
+    for act in rows:
+        hides.setdefault(act.trx_id, []).append(act)
+    return hides
+
+
+def _merge_mod_streams(hidden: list, pending: list, limit: int) -> list[dict]:
+    """Merge two (key, item) lists already sorted newest first; keep `limit`."""
+    merged = heapq.merge(hidden, pending, key=lambda kv: kv[0], reverse=True)
+    return [item for _, item in islice(merged, limit)]
+
+
+def _serialize_message(
+    m, max_len: int | None, heart_counts: dict[str, int], viewer_hearts: set[str]
+) -> dict:
+    """API dict for a message row; content is truncated when max_len is set."""
+    content = m.content or ""
+    return {
+        "trx_id": m.trx_id,
+        "block_num": m.block_num,
+        "timestamp": m.timestamp.isoformat(),
+        "author": m.author,
+        "type": m.type,
+        "content": content[:max_len] if max_len is not None else m.content,
+        "html": message_html(m, max_len),
+        "mentions": m.mentions or [],
+        "tags": m.tags or [],
+        "reply_to": m.reply_to,
+        "hearts": int(heart_counts.get(m.trx_id, 0)),
+        "viewer_hearted": bool(m.trx_id in viewer_hearts),
+    }
+
+
+def _stream_items(items):
+    """Stream `{"count": n, "items": [...]}` one encoded item at a time.
+
+    Each post is rendered and serialized as it is sent, so large pages never
+    hold the whole item list and its JSON text in memory at once.
+    """
+    dumps = current_app.json.dumps
+
+    def _gen():
+        count = 0
+        yield '{"items":['
+        for item in items:
+            if count:
+                yield ","
+            yield dumps(item)
+            count += 1
+        yield f'],"count":{count}}}\n'
+
+    return current_app.response_class(
+        stream_with_context(_gen()), mimetype=current_app.json.mimetype
+    )
 
 
 @api_bp.route("/tags/trending")
+@cache.cached(timeout=60, query_string=True)
 def api_tags_trending():
     try:
         window = max(50, min(int(request.args.get("window", 500)), 5000))
@@ -43,30 +254,88 @@ def api_tags_trending():
     except Exception:
         limit = 10
 
-    q = (
-        Message.query.filter(~Message.trx_id.in_(_hidden_trx_subquery()))
+    # Count tags over the most recent `window` visible posts in SQL
+    recent = (
+        db.session.query(Message.id)
+        .filter(_not_hidden())
         .order_by(Message.timestamp.desc())
         .limit(window)
+        .subquery()
     )
-    rows = q.all()
-    counts: dict[str, int] = {}
-    for m in rows:
-        try:
-            if not m.tags:
-                continue
-            tg = json.loads(m.tags)
-            if isinstance(tg, list):
-                for t in tg:
-                    key = str(t).strip().lower()
-                    if not key:
-                        continue
-                    counts[key] = counts.get(key, 0) + 1
-        except Exception:
-            continue
+    cnt = db.func.count().label("c")
+    rows = (
+        db.session.query(MessageTag.tag, cnt)
+        .join(recent, recent.c.id == MessageTag.message_id)
+        .group_by(MessageTag.tag)
+        .order_by(cnt.desc(), MessageTag.tag.asc())
+        .limit(limit)
+        .all()
+    )
+    items = [{"tag": t, "count": int(c)} for t, c in rows]
+    resp = jsonify({"items": items, "count": len(items)})
+    # Browsers may reuse it for the server cache TTL and refresh in the
+    # background; private because every response also sets the CSRF cookie
+    resp.headers["Cache-Control"] = "private, max-age=60, stale-while-revalidate=300"
+    return resp
+
+
+def _timeline_sort_cols(tag_filter):
+    """(timestamp, message id) columns timelines filter and sort on.
+
+    Tag pages walk message_tags (tag, timestamp, message_id) in order; its
+    columns mirror the message's, so they use those copies.
+    """
+    if tag_filter:
+        return MessageTag.timestamp, MessageTag.message_id
+    return Message.timestamp, Message.id
 
-    top = sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))[:limit]
-    items = [{"tag": k, "count": v} for k, v in top]
-    return jsonify({"items": items, "count": len(items)})
+
+def _page_cursor(ts: datetime, key) -> str:
+    """Keyset cursor for the page after a row: `<iso timestamp>_<tie-break key>`."""
+    return f"{ts.isoformat()}_{key}"
+
+
+def _apply_cursor(q, cursor: str | None, ts_col, id_col, key_type=int):
+    """Keep rows sorting after the cursor in (timestamp desc, id desc) order.
+
+    Posts from the same block share a timestamp, so the message id (or the
+    trx_id, with key_type=str, for moderation feeds) breaks ties. A bare ISO
+    timestamp (older clients) still pages by time alone.
+    """
+    if not cursor:
+        return q
+    ts, _, mid = cursor.partition("_")
+    try:
+        dt = datetime.fromisoformat(ts)
+        mid = key_type(mid) if mid else None
+    except ValueError:
+        return q
+    if mid is None:
+        return q.filter(ts_col < dt)
+    # ts <= dt keeps the seek on the timestamp index; the OR breaks ties
+    return q.filter(
+        ts_col <= dt, db.or_(ts_col < dt, db.and_(ts_col == dt, id_col < mid))
+    )
+
+
+def _filter_timeline(q, tag_filter, following_flag: bool):
+    """Apply the tag/following filters shared by the timeline endpoints.
+
+    Returns None when the viewer follows nobody, so callers can answer with an
+    empty result without querying. Callers add _not_hidden() after their own
+    cursor/author predicates, so cheap column comparisons run before the
+    per-row moderation probe.
+    """
+    if tag_filter:
+        q = q.join(MessageTag, MessageTag.message_id == Message.id).filter(
+            MessageTag.tag == tag_filter.lower()
+        )
+    if following_flag and session.get("username"):
+        flw = _get_following_usernames(session["username"]) or set()
+        if not flw:
+            return None
+        q = q.filter(Message.author.in_(list(flw)))
+    return q
 
 
 @api_bp.route("/timeline")
@@ -82,98 +351,55 @@ def api_timeline():
     tag_filter = request.args.get("tag")
     author_filter = request.args.get("author")
 
-    q = Message.query
+    ts_col, id_col = _timeline_sort_cols(tag_filter)
     include_hidden = request.args.get("include_hidden") == "1"
     is_mod = session.get("username", "").lower() in (
         current_app.config.get("MODERATORS") or []
     )
-    if not (include_hidden and is_mod):
-        q = q.filter(~Message.trx_id.in_(_hidden_trx_subquery()))
-    if cursor:
-        try:
-            dt = datetime.fromisoformat(cursor)
-            q = q.filter(Message.timestamp < dt)
-        except Exception:
-            pass
-
-    if following_flag and session.get("username"):
-        flw = _get_following_usernames(session["username"]) or set()
-        if flw:
-            q = q.filter(Message.author.in_(list(flw)))
-        else:
-            q = q.filter(db.text("0"))
-
-    if tag_filter:
-        like_pattern = f'%"{tag_filter.lower()}"%'
-        q = q.filter(Message.tags.like(like_pattern))
+    # Moderators asking for hidden posts get them flagged instead of filtered
+    show_hidden = include_hidden and is_mod
+    max_len = int(current_app.config.get("CONTENT_MAX_LEN", 512))
+    q = _filter_timeline(
+        db.session.query(*_preview_cols(max_len)),
+        tag_filter,
+        following_flag,
+    )
+    if q is None:
+        return jsonify({"items": [], "count": 0})
+    q = _apply_cursor(q, cursor, ts_col, id_col)
 
     # Optional author filter for profile timelines
     if author_filter:
         q = q.filter(Message.author == author_filter)
+    if not show_hidden:
+        q = q.filter(_not_hidden())
 
-    q = q.order_by(Message.timestamp.desc()).limit(limit)
-
-    items = []
-    max_len = int(current_app.config.get("CONTENT_MAX_LEN", 512))
+    q = q.order_by(ts_col.desc(), id_col.desc()).limit(limit)
     posts = q.all()
-    include_hidden = request.args.get("include_hidden") == "1"
-    is_mod = session.get("username", "").lower() in (
-        current_app.config.get("MODERATORS") or []
-    )
 
     # --- Appreciation aggregation ---
-    post_ids = [m.trx_id for m in posts]
-    heart_counts_map = {}
-    viewer_hearts = set()
-    if post_ids:
-        rows = (
-            db.session.query(Appreciation.trx_id, db.func.count(Appreciation.id))
-            .filter(Appreciation.trx_id.in_(post_ids))
-            .group_by(Appreciation.trx_id)
-            .all()
-        )
-        heart_counts_map = {trx: cnt for trx, cnt in rows}
-        if session.get("username"):
-            viewer = session["username"].lower()
-            you_rows = (
-                db.session.query(Appreciation.trx_id)
-                .filter(Appreciation.trx_id.in_(post_ids))
-                .filter(Appreciation.username == viewer)
-                .all()
-            )
-            viewer_hearts = {r[0] for r in you_rows}
-
-    for m in posts:
-        hidden_flag = False
-        mod_reason = None
-        if include_hidden and is_mod:
-            mod = Moderation.query.filter_by(trx_id=m.trx_id).first()
-            hidden_flag = bool(mod and mod.visibility == "hidden")
-            mod_reason = mod.mod_reason if (mod and mod.mod_reason) else None
-        text = (m.content or "")[:max_len]
-        items.append(
-            {
-                "trx_id": m.trx_id,
-                "block_num": m.block_num,
-                "timestamp": m.timestamp.isoformat(),
-                "author": m.author,
-                "type": m.type,
-                "content": text,
-                "html": markdown_render(text),
-                "mentions": json.loads(m.mentions) if m.mentions else [],
-                "tags": json.loads(m.tags) if m.tags else [],
-                "reply_to": m.reply_to,
-                "hearts": int(heart_counts_map.get(m.trx_id, 0)),
-                "viewer_hearted": bool(m.trx_id in viewer_hearts),
-                **(
-                    {"hidden": hidden_flag, "mod_reason": mod_reason}
-                    if (include_hidden and is_mod)
-                    else {}
-                ),
-            }
-        )
+    heart_counts_map, viewer_hearts = _heart_maps([m.trx_id for m in posts])
+
+    # Finish every query before the first byte goes out: once streaming starts
+    # the 200 is committed, so the generators only format rows in memory
+    mods = _moderation_map([m.trx_id for m in posts]) if show_hidden else {}
 
-    return jsonify({"items": items, "count": len(items)})
+    def _items():
+        for m in posts:
+            item = _serialize_message(m, max_len, heart_counts_map, viewer_hearts)
+            item["cursor"] = _page_cursor(m.timestamp, m.id)
+            yield item
+
+    def _items_with_moderation():
+        for m in posts:
+            mod = mods.get(m.trx_id)
+            item = _serialize_message(m, max_len, heart_counts_map, viewer_hearts)
+            item["cursor"] = _page_cursor(m.timestamp, m.id)
+            item["hidden"] = bool(mod and mod.visibility == "hidden")
+            item["mod_reason"] = mod.mod_reason if (mod and mod.mod_reason) else None
+            yield item
+
+    return _stream_items(_items_with_moderation() if show_hidden else _items())
 
 
 @api_bp.route("/timeline/new_count")
@@ -189,43 +415,42 @@ def api_timeline_new_count():
     following_flag = request.args.get("following", "0") == "1"
     tag_filter = request.args.get("tag")
 
-    q = Message.query.filter(Message.timestamp > dt)
+    # COUNT and newest timestamp of the same filtered set in one query
+    ts_col, _ = _timeline_sort_cols(tag_filter)
     include_hidden = request.args.get("include_hidden") == "1"
     is_mod = session.get("username", "").lower() in (
         current_app.config.get("MODERATORS") or []
     )
-    if not (include_hidden and is_mod):
-        q = q.filter(~Message.trx_id.in_(_hidden_trx_subquery()))
-
-    if following_flag and session.get("username"):
-        flw = _get_following_usernames(session["username"]) or set()
-        if flw:
-            q = q.filter(Message.author.in_(list(flw)))
-        else:
-            q = q.filter(db.text("0"))
-
-    if tag_filter:
-        like_pattern = f'%"{tag_filter.lower()}"%'
-        q = q.filter(Message.tags.like(like_pattern))
-
-    cnt = q.count()
-    latest = (
-        q.order_by(Message.timestamp.desc()).first().timestamp.isoformat()
-        if cnt > 0
-        else None
+    q = _filter_timeline(
+        db.session.query(db.func.count(Message.id), db.func.max(ts_col)).select_from(
+            Message
+        ),
+        tag_filter,
+        following_flag,
     )
-    return jsonify({"count": cnt, "latest": latest})
+    if q is None:
+        return jsonify({"count": 0, "latest": None})
+    q = q.filter(ts_col > dt)
+    if not (include_hidden and is_mod):
+        q = q.filter(_not_hidden())
+    cnt, newest = q.one()
+    latest = newest.isoformat() if cnt > 0 and newest else None
+    # Polled endpoint: the body is fully determined by (count, latest), so a
+    # client revalidating with If-None-Match gets an empty 304 when unchanged
+    resp = jsonify({"count": cnt, "latest": latest})
+    resp.set_etag(f"{cnt}-{latest or ''}")
+    return resp.make_conditional(request)
 
 
 @api_bp.route("/post/<trx_id>")
 def api_post(trx_id: str):
     if not trx_id:
         return jsonify({"error": "missing trx_id"}), 400
-    m = Message.query.filter_by(trx_id=trx_id).first()
+    m = db.session.query(*_MESSAGE_COLS).filter(Message.trx_id == trx_id).first()
     if not m:
         return jsonify({"error": "not found"}), 404
     # Moderation: show removed stub to non-moderators
-    mod = Moderation.query.filter_by(trx_id=trx_id).first()
+    mod = db.session.get(Moderation, trx_id)
     hidden = bool(mod and mod.visibility == "hidden")
     is_mod = session.get("username", "").lower() in (
         current_app.config.get("MODERATORS") or []
@@ -244,66 +469,17 @@ def api_post(trx_id: str):
                 "replies": [],
             }
         )
-    # Hearts aggregation for main post and replies
-    item = {
-        "trx_id": m.trx_id,
-        "block_num": m.block_num,
-        "timestamp": m.timestamp.isoformat(),
-        "author": m.author,
-        "type": m.type,
-        "content": m.content,
-        "html": markdown_render(m.content),
-        "mentions": json.loads(m.mentions) if m.mentions else [],
-        "tags": json.loads(m.tags) if m.tags else [],
-        "reply_to": m.reply_to,
-    }
-    replies_q = Message.query.filter_by(reply_to=trx_id).order_by(
-        Message.timestamp.asc()
+    replies_rows = (
+        db.session.query(*_MESSAGE_COLS)
+        .filter(Message.reply_to == trx_id)
+        .order_by(Message.timestamp.asc())
+        .all()
     )
-    replies_rows = replies_q.all()
 
     # Batch load hearts for item and replies
-    heart_ids = [m.trx_id for m in replies_rows] + [m.trx_id]
-    counts_map = {}
-    you_set = set()
-    if heart_ids:
-        rows = (
-            db.session.query(Appreciation.trx_id, db.func.count(Appreciation.id))
-            .filter(Appreciation.trx_id.in_(heart_ids))
-            .group_by(Appreciation.trx_id)
-            .all()
-        )
-        counts_map = {trx: cnt for trx, cnt in rows}
-        if session.get("username"):
-            viewer = session["username"].lower()
-            yr = (
-                db.session.query(Appreciation.trx_id)
-                .filter(Appreciation.trx_id.in_(heart_ids))
-                .filter(Appreciation.username == viewer)
-                .all()
-            )
-            you_set = {r[0] for r in yr}
-
-    item["hearts"] = int(counts_map.get(m.trx_id, 0))
-    item["viewer_hearted"] = bool(m.trx_id in you_set)
-    replies = []
-    for r in replies_rows:
-        replies.append(
-            {
-                "trx_id": r.trx_id,
-                "block_num": r.block_num,
-                "timestamp": r.timestamp.isoformat(),
-                "author": r.author,
-                "type": r.type,
-                "content": r.content,
-                "html": markdown_render(r.content),
-                "mentions": json.loads(r.mentions) if r.mentions else [],
-                "tags": json.loads(r.tags) if r.tags else [],
-                "reply_to": r.reply_to,
-                "hearts": int(counts_map.get(r.trx_id, 0)),
-                "viewer_hearted": bool(r.trx_id in you_set),
-            }
-        )
+    counts_map, you_set = _heart_maps([r.trx_id for r in replies_rows] + [m.trx_id])
+    item = _serialize_message(m, None, counts_map, you_set)
+    replies = [_serialize_message(r, None, counts_map, you_set) for r in replies_rows]
     return jsonify({"item": item, "replies": replies})
 
 
@@ -315,27 +491,25 @@ def api_heart():
     trx_id = (data.get("trx_id") or "").strip()
     if not trx_id:
         return jsonify({"success": False, "error": "missing trx_id"}), 400
-    m = Message.query.filter_by(trx_id=trx_id).first()
+    m = db.session.query(Message.id).filter(Message.trx_id == trx_id).first()
     if not m:
         return jsonify({"success": False, "error": "not found"}), 404
     viewer = session["username"].lower()
-    # Insert if not exists
-    exists = (
-        db.session.query(Appreciation.id)
-        .filter(Appreciation.trx_id == trx_id, Appreciation.username == viewer)
-        .first()
-    )
-    if not exists:
-        apprec = Appreciation(
-            trx_id=trx_id,
-            username=viewer,
-            created_at=_utcnow_naive(),
+    # Insert if not exists; a repeat heart (e.g. double click) is a no-op
+    try:
+        db.session.execute(
+            _insert_ignoring_duplicates(
+                Appreciation, index_elements=("trx_id", "username")
+            ).values(trx_id=trx_id, username=viewer, created_at=_utcnow_naive())
         )
-        db.session.add(apprec)
         db.session.commit()
+    except IntegrityError:
+        # Databases without ON CONFLICT: the row is already there
+        db.session.rollback()
     # Return updated count
     cnt = (
-        db.session.query(db.func.count(Appreciation.id))
+        db.session.query(db.func.count())
+        .select_from(Appreciation)
         .filter(Appreciation.trx_id == trx_id)
         .scalar()
     )
@@ -356,7 +530,8 @@ def api_unheart():
     ).delete()
     db.session.commit()
     cnt = (
-        db.session.query(db.func.count(Appreciation.id))
+        db.session.query(db.func.count())
+        .select_from(Appreciation)
         .filter(Appreciation.trx_id == trx_id)
         .scalar()
     )
@@ -397,7 +572,8 @@ def mod_audit_public():
 
     Query params:
     - limit: max items (default 20, max 100)
-    - cursor: ISO timestamp to paginate before, based on moderation timestamp
+    - cursor: the last item's `cursor` (moderation timestamp and trx_id); a bare
+      ISO timestamp still pages by moderation time alone
     - status: 'all' | 'hidden' | 'pending'
     """
     try:
@@ -411,101 +587,62 @@ def mod_audit_public():
         status = "all"
 
     cursor = request.args.get("cursor")
-    cursor_dt = None
-    if cursor:
-        try:
-            cursor_dt = datetime.fromisoformat(cursor)
-        except Exception:
-            cursor_dt = None
-
-    items: list[dict] = []
+
     quorum = int(current_app.config.get("MOD_QUORUM", 1))
     is_mod = session.get("username", "").lower() in (
         current_app.config.get("MODERATORS") or []
     )
 
-    # 1) Hidden items (from Moderation table), ordered by mod_at desc
-    mod_q = Moderation.query.filter(Moderation.visibility == "hidden")
-    if cursor_dt is not None:
-        mod_q = mod_q.filter(Moderation.mod_at < cursor_dt)
-    mod_q = mod_q.order_by(Moderation.mod_at.desc()).limit(limit)
-    hidden_rows = mod_q.all()
+    # 1) Hidden items (from Moderation table), ordered by (mod_at, trx_id) desc
+    # Skip the stream the status filter would discard anyway
+    hidden_rows = _hidden_page(cursor, limit) if status != "pending" else []
+    hidden_items: list[tuple] = []
+    hidden_msgs = _mod_item_messages([mod.trx_id for mod in hidden_rows])
     for mod in hidden_rows:
-        m = Message.query.filter_by(trx_id=mod.trx_id).first()
+        m = hidden_msgs.get(mod.trx_id)
         if not m:
             continue
         display_content = m.content if is_mod else "[Content hidden by moderator]"
-        items.append(
-            {
-                "trx_id": m.trx_id,
-                "author": m.author,
-                "content": display_content,
-                "tags": json.loads(m.tags) if m.tags else [],
-                "hidden": True,
-                "pending": False,
-                "quorum": quorum,
-                "mod_reason": mod.mod_reason,
-                "mod_by": mod.mod_by,
-                "mod_at": mod.mod_at.isoformat() if mod.mod_at else None,
-                "approvals": None,
-                "approvers": [],
-                "last_action_at": None,
-                "last_reason": None,
-                "visibility": "hidden",
-                # moderation timestamp used for pagination/sorting
-                "mod_ts": mod.mod_at.isoformat() if mod.mod_at else None,
-            }
-        )
-
-    # 2) Pending items based on ModerationAction (hide) since last unhide
-    # Gather latest hide actions per trx_id, ordered by created_at desc
-    act_q = ModerationAction.query.filter(ModerationAction.action == "hide")
-    if cursor_dt is not None:
-        act_q = act_q.filter(ModerationAction.created_at < cursor_dt)
-    act_q = act_q.order_by(ModerationAction.created_at.desc()).limit(limit * 3)
-    acts = act_q.all()
-
-    seen_trx = set()
-    for a in acts:
-        if a.trx_id in seen_trx:
-            continue
-        seen_trx.add(a.trx_id)
-
-        # Skip if already hidden
-        mod = Moderation.query.filter_by(trx_id=a.trx_id).first()
-        if mod and mod.visibility == "hidden":
-            continue
-
-        # Compute approvals since last unhide
-        last_unhide = (
-            db.session.query(ModerationAction.created_at)
-            .filter(
-                ModerationAction.trx_id == a.trx_id,
-                ModerationAction.action == "unhide",
+        hidden_items.append(
+            (
+                (mod.mod_at, mod.trx_id),
+                {
+                    "trx_id": m.trx_id,
+                    "author": m.author,
+                    "content": display_content,
+                    "tags": m.tags or [],
+                    "hidden": True,
+                    "pending": False,
+                    "quorum": quorum,
+                    "mod_reason": mod.mod_reason,
+                    "mod_by": mod.mod_by,
+                    "mod_at": mod.mod_at.isoformat() if mod.mod_at else None,
+                    "approvals": None,
+                    "approvers": [],
+                    "last_action_at": None,
+                    "last_reason": None,
+                    "visibility": "hidden",
+                    # moderation timestamp used for pagination/sorting
+                    "mod_ts": mod.mod_at.isoformat(),
+                    "cursor": _page_cursor(mod.mod_at, mod.trx_id),
+                },
             )
-            .order_by(ModerationAction.created_at.desc())
-            .first()
-        )
-        cutoff = last_unhide[0] if last_unhide else None
-        approvals_q = db.session.query(ModerationAction.moderator).filter(
-            ModerationAction.trx_id == a.trx_id,
-            ModerationAction.action == "hide",
         )
-        if cutoff is not None:
-            approvals_q = approvals_q.filter(ModerationAction.created_at > cutoff)
-        approvals = approvals_q.distinct().count()
-        pending = (quorum > 1) and (approvals > 0) and (approvals < quorum)
-        if not pending:
-            continue
 
+    # 2) Pending items: hides since the last unhide that are short of quorum,
+    # ordered by (latest hide, trx_id) desc. Nothing can be pending without a
+    # quorum above one.
+    acts = (
+        _pending_candidates(cursor, limit, quorum)
+        if status != "hidden" and quorum > 1
+        else []
+    )
+    act_msgs = _mod_item_messages([a.trx_id for a in acts])
+    act_hides = _hides_since_unhide([a.trx_id for a in acts])
+    pending_items: list[tuple] = []
+    for a in acts:
         # Gather details
-        hide_actions_q = ModerationAction.query.filter(
-            ModerationAction.trx_id == a.trx_id,
-            ModerationAction.action == "hide",
-        )
-        if cutoff is not None:
-            hide_actions_q = hide_actions_q.filter(ModerationAction.created_at > cutoff)
-        hide_actions = hide_actions_q.order_by(ModerationAction.created_at.desc()).all()
+        hide_actions = act_hides.get(a.trx_id, [])
         approvers_list: list[str] = []
         latest_action_at = None
         latest_reason = None
@@ -518,60 +655,48 @@ def mod_audit_public():
             latest_action_at = hide_actions[0].created_at.isoformat()
             latest_reason = hide_actions[0].reason
 
-        m = Message.query.filter_by(trx_id=a.trx_id).first()
+        m = act_msgs.get(a.trx_id)
         if not m:
             continue
         display_content = m.content if is_mod else "[Content pending moderation]"
-        items.append(
-            {
-                "trx_id": m.trx_id,
-                "author": m.author,
-                "content": display_content,
-                "tags": json.loads(m.tags) if m.tags else [],
-                "hidden": False,
-                "pending": True,
-                "quorum": quorum,
-                "mod_reason": None,
-                "mod_by": None,
-                "mod_at": None,
-                "approvals": int(approvals),
-                "approvers": approvers_list,
-                "last_action_at": latest_action_at,
-                "last_reason": latest_reason,
-                "visibility": "public",
-                # moderation timestamp used for pagination/sorting
-                "mod_ts": latest_action_at,
-            }
+        pending_items.append(
+            (
+                (a.created_at, a.trx_id),
+                {
+                    "trx_id": m.trx_id,
+                    "author": m.author,
+                    "content": display_content,
+                    "tags": m.tags or [],
+                    "hidden": False,
+                    "pending": True,
+                    "quorum": quorum,
+                    "mod_reason": None,
+                    "mod_by": None,
+                    "mod_at": None,
+                    "approvals": int(a.approvals),
+                    "approvers": approvers_list,
+                    "last_action_at": latest_action_at,
+                    "last_reason": latest_reason,
+                    "visibility": "public",
+                    # moderation timestamp used for pagination/sorting
+                    "mod_ts": latest_action_at,
+                    "cursor": _page_cursor(a.created_at, a.trx_id),
+                },
+            )
         )
 
-    # Status filter and ordering by moderation timestamp
-    def _pick_ts(x: dict) -> str | None:
-        return x.get("mod_ts") or x.get("mod_at") or x.get("last_action_at")
+    # Both streams are keyset-ordered, so a bounded merge yields the page
+    items = _merge_mod_streams(hidden_items, pending_items, limit)
 
-    if status == "hidden":
-        items = [it for it in items if it.get("hidden") is True]
-    elif status == "pending":
-        items = [it for it in items if it.get("pending") is True]
-    else:
-        items = [
-            it
-            for it in items
-            if (it.get("hidden") or it.get("pending") or it.get("mod_reason"))
-        ]
+    return jsonify({"items": items})
 
-    items.sort(key=lambda it: _pick_ts(it) or "", reverse=True)
 
-    # Pagination by moderation timestamp
-    if cursor_dt is not None:
-        items = [
-            it
-            for it in items
-            if (_pick_ts(it) and datetime.fromisoformat(_pick_ts(it)) < cursor_dt)
-        ]
+# Unread mention badges are polled; a few seconds of lag is fine
+MENTIONS_COUNT_TTL = 10
 
-    items = items[:limit]
 
-    return jsonify({"items": items})
+def _mentions_count_cache_key(username: str) -> str:
+    return f"mentions_count:{username}"
 
 
 @api_bp.route("/mentions/count")
@@ -579,13 +704,22 @@ def api_mentions_count():
     if "username" not in session:
         return jsonify({"count": 0}), 401
     uname = session["username"].lower()
-    like_pattern = f'%"{uname}"%'
-    q = Message.query.filter(Message.mentions.like(like_pattern))
-    q = q.filter(~Message.trx_id.in_(_hidden_trx_subquery()))
-    state = MentionState.query.get(uname)
+    cache_key = _mentions_count_cache_key(uname)
+    cnt = cache.get(cache_key)
+    if cnt is not None:
+        return jsonify({"count": cnt})
+    q = (
+        db.session.query(db.func.count())
+        .select_from(Message)
+        .join(MessageMention, MessageMention.message_id == Message.id)
+        .filter(MessageMention.username == uname)
+    )
+    state = db.session.get(MentionState, uname)
     if state and state.last_seen:
-        q = q.filter(Message.timestamp > state.last_seen)
-    cnt = q.count()
+        q = q.filter(MessageMention.timestamp > state.last_seen)
+    q = q.filter(_not_hidden())
+    cnt = q.scalar()
+    cache.set(cache_key, cnt, timeout=MENTIONS_COUNT_TTL)
     return jsonify({"count": cnt})
 
 
@@ -595,20 +729,58 @@ def api_mentions_seen():
         return jsonify({"success": False}), 401
     uname = session["username"].lower()
     now = _utcnow_naive()
-    state = MentionState.query.get(uname)
+    state = db.session.get(MentionState, uname)
     if state is None:
         state = MentionState(username=uname, last_seen=now)
         db.session.add(state)
+    elif state.last_seen and (now - state.last_seen).total_seconds() < 1:
+        # Repeated calls within a second: nothing new to mark, skip the write
+        return jsonify({"success": True, "last_seen": state.last_seen.isoformat()})
     else:
         state.last_seen = now
     db.session.commit()
+    cache.delete(_mentions_count_cache_key(uname))
     return jsonify({"success": True, "last_seen": now.isoformat()})
 
 
+STATUS_COUNT_TTL = 30
+# Hard expiry of the last known count, so a stuck recount cannot pin it forever
+STATUS_COUNT_STALE_TTL = 300
+
+
+def _message_count() -> int:
+    """Total stored messages, recounted at most once per STATUS_COUNT_TTL.
+
+    The cache holds (total, fresh_until). Once it goes stale, the caller that
+    wins the cache.add() lock runs the COUNT; concurrent callers keep serving
+    the stale total instead of all scanning the table at once.
+    """
+    cached = cache.get("status:messages")
+    if cached is not None:
+        total, fresh_until = cached
+        if time.time() < fresh_until:
+            return total
+    locked = cache.add("status:messages:lock", 1, timeout=STATUS_COUNT_TTL)
+    if not locked and cached is not None:
+        return cached[0]
+    try:
+        total = db.session.query(db.func.count(Message.id)).scalar() or 0
+        cache.set(
+            "status:messages",
+            (total, time.time() + STATUS_COUNT_TTL),
+            timeout=STATUS_COUNT_STALE_TTL,
+        )
+    finally:
+        if locked:
+            cache.delete("status:messages:lock")
+    return total
+
+
 @api_bp.route("/status")
+@cache.cached(timeout=5)
 def api_status():
-    total = Message.query.count()
-    ck = Checkpoint.query.get(1)
+    total = _message_count()
+    ck = db.session.get(Checkpoint, 1)
     return jsonify(
         {
             "messages": total,
@@ -631,66 +803,30 @@ def api_mentions():
 
     cursor = request.args.get("cursor")
 
-    q = Message.query
-    if cursor:
-        try:
-            dt = datetime.fromisoformat(cursor)
-            q = q.filter(Message.timestamp < dt)
-        except Exception:
-            pass
-
     uname = session["username"].lower()
-    like_pattern = f'%"{uname}"%'
-    q = q.filter(Message.mentions.like(like_pattern))
-
-    q = q.order_by(Message.timestamp.desc()).limit(limit)
-
-    items = []
     max_len = int(current_app.config.get("CONTENT_MAX_LEN", 512))
+    q = (
+        db.session.query(*_preview_cols(max_len))
+        .join(MessageMention, MessageMention.message_id == Message.id)
+        .filter(MessageMention.username == uname)
+    )
+    q = _apply_cursor(q, cursor, MessageMention.timestamp, MessageMention.message_id)
+    q = q.filter(_not_hidden())
+    q = q.order_by(
+        MessageMention.timestamp.desc(), MessageMention.message_id.desc()
+    ).limit(limit)
     rows = q.all()
 
     # Appreciation aggregation for mentions list
-    post_ids = [m.trx_id for m in rows]
-    heart_counts_map = {}
-    viewer_hearts = set()
-    if post_ids:
-        counts_rows = (
-            db.session.query(Appreciation.trx_id, db.func.count(Appreciation.id))
-            .filter(Appreciation.trx_id.in_(post_ids))
-            .group_by(Appreciation.trx_id)
-            .all()
-        )
-        heart_counts_map = {trx: cnt for trx, cnt in counts_rows}
-        if session.get("username"):
-            viewer = session["username"].lower()
-            you_rows = (
-                db.session.query(Appreciation.trx_id)
-                .filter(Appreciation.trx_id.in_(post_ids))
-                .filter(Appreciation.username == viewer)
-                .all()
-            )
-            viewer_hearts = {r[0] for r in you_rows}
+    heart_counts_map, viewer_hearts = _heart_maps([m.trx_id for m in rows])
 
-    for m in rows:
-        text = (m.content or "")[:max_len]
-        items.append(
-            {
-                "trx_id": m.trx_id,
-                "block_num": m.block_num,
-                "timestamp": m.timestamp.isoformat(),
-                "author": m.author,
-                "type": m.type,
-                "content": text,
-                "html": markdown_render(text),
-                "mentions": json.loads(m.mentions) if m.mentions else [],
-                "tags": json.loads(m.tags) if m.tags else [],
-                "reply_to": m.reply_to,
-                "hearts": int(heart_counts_map.get(m.trx_id, 0)),
-                "viewer_hearted": bool(m.trx_id in viewer_hearts),
-            }
-        )
+    def _items():
+        for m in rows:
+            item = _serialize_message(m, max_len, heart_counts_map, viewer_hearts)
+            item["cursor"] = _page_cursor(m.timestamp, m.id)
+            yield item
 
-    return jsonify({"items": items, "count": len(items)})
+    return _stream_items(_items())
 
 
 @api_bp.route("/mod/list")
@@ -709,134 +845,74 @@ def mod_list():
     if status not in ("all", "hidden", "pending"):
         status = "all"
     cursor = request.args.get("cursor")
-    cursor_dt = None
-    if cursor:
-        try:
-            cursor_dt = datetime.fromisoformat(cursor)
-        except Exception:
-            cursor_dt = None
 
     quorum = int(current_app.config.get("MOD_QUORUM", 1))
-    items: list[dict] = []
-
-    # 1) Hidden items ordered by moderation time
-    mod_q = Moderation.query.filter(Moderation.visibility == "hidden")
-    if cursor_dt is not None:
-        mod_q = mod_q.filter(Moderation.mod_at < cursor_dt)
-    mod_q = mod_q.order_by(Moderation.mod_at.desc()).limit(limit)
-    hidden_rows = mod_q.all()
+
+    # 1) Hidden items ordered by (moderation time, trx_id) desc
+    # Skip the stream the status filter would discard anyway
+    hidden_rows = _hidden_page(cursor, limit) if status != "pending" else []
+    hidden_msgs = _mod_item_messages([mod.trx_id for mod in hidden_rows])
+    hidden_items: list[tuple] = []
     for mod in hidden_rows:
-        m = Message.query.filter_by(trx_id=mod.trx_id).first()
+        m = hidden_msgs.get(mod.trx_id)
         if not m:
             continue
-        items.append(
-            {
-                "trx_id": m.trx_id,
-                # Use moderation timestamp for ordering/pagination
-                "timestamp": mod.mod_at.isoformat()
-                if mod.mod_at
-                else m.timestamp.isoformat(),
-                "author": m.author,
-                "content": m.content,
-                "tags": json.loads(m.tags) if m.tags else [],
-                "hidden": True,
-                "pending": False,
-                "approvals": None,
-                "quorum": quorum,
-                "mod_reason": mod.mod_reason if mod and mod.mod_reason else None,
-            }
-        )
-
-    # 2) Pending items: latest hide approvals since last unhide, ordered by last action time
-    act_q = ModerationAction.query.filter(ModerationAction.action == "hide")
-    if cursor_dt is not None:
-        act_q = act_q.filter(ModerationAction.created_at < cursor_dt)
-    act_q = act_q.order_by(ModerationAction.created_at.desc()).limit(limit * 3)
-    acts = act_q.all()
-    seen_trx: set[str] = set()
-    for a in acts:
-        if a.trx_id in seen_trx:
-            continue
-        seen_trx.add(a.trx_id)
-        # Skip if already hidden
-        mod = Moderation.query.filter_by(trx_id=a.trx_id).first()
-        if mod and mod.visibility == "hidden":
-            continue
-        # Compute approvals since last unhide
-        last_unhide = (
-            db.session.query(ModerationAction.created_at)
-            .filter(
-                ModerationAction.trx_id == a.trx_id,
-                ModerationAction.action == "unhide",
+        hidden_items.append(
+            (
+                (mod.mod_at, mod.trx_id),
+                {
+                    "trx_id": m.trx_id,
+                    # Use moderation timestamp for ordering/pagination
+                    "timestamp": mod.mod_at.isoformat(),
+                    "cursor": _page_cursor(mod.mod_at, mod.trx_id),
+                    "author": m.author,
+                    "content": m.content,
+                    "tags": m.tags or [],
+                    "hidden": True,
+                    "pending": False,
+                    "approvals": None,
+                    "quorum": quorum,
+                    "mod_reason": mod.mod_reason if mod and mod.mod_reason else None,
+                },
             )
-            .order_by(ModerationAction.created_at.desc())
-            .first()
-        )
-        cutoff = last_unhide[0] if last_unhide else None
-        approvals_q = db.session.query(ModerationAction.moderator).filter(
-            ModerationAction.trx_id == a.trx_id,
-            ModerationAction.action == "hide",
-        )
-        if cutoff is not None:
-            approvals_q = approvals_q.filter(ModerationAction.created_at > cutoff)
-        approvals = approvals_q.distinct().count()
-
-        pending = (quorum > 1) and (approvals > 0) and (approvals < quorum)
-        if not pending:
-            continue
-
-        # Get latest hide action time and reason after cutoff
-        hide_actions_q = ModerationAction.query.filter(
-            ModerationAction.trx_id == a.trx_id,
-            ModerationAction.action == "hide",
         )
-        if cutoff is not None:
-            hide_actions_q = hide_actions_q.filter(ModerationAction.created_at > cutoff)
-        latest_hide = hide_actions_q.order_by(
-            ModerationAction.created_at.desc()
-        ).first()
 
-        m = Message.query.filter_by(trx_id=a.trx_id).first()
+    # 2) Pending items: hide approvals since last unhide that are short of
+    # quorum, ordered by (latest hide, trx_id) desc. Nothing can be pending
+    # without a quorum above one.
+    acts = (
+        _pending_candidates(cursor, limit, quorum)
+        if status != "hidden" and quorum > 1
+        else []
+    )
+    act_msgs = _mod_item_messages([a.trx_id for a in acts])
+    pending_items: list[tuple] = []
+    for a in acts:
+        m = act_msgs.get(a.trx_id)
         if not m:
             continue
-        items.append(
-            {
-                "trx_id": m.trx_id,
-                # Use latest hide action time as moderation timestamp
-                "timestamp": latest_hide.created_at.isoformat()
-                if latest_hide
-                else m.timestamp.isoformat(),
-                "author": m.author,
-                "content": m.content,
-                "tags": json.loads(m.tags) if m.tags else [],
-                "hidden": False,
-                "pending": True,
-                "approvals": int(approvals),
-                "quorum": quorum,
-                "mod_reason": None,
-            }
+        pending_items.append(
+            (
+                (a.created_at, a.trx_id),
+                {
+                    "trx_id": m.trx_id,
+                    # Use latest hide action time as moderation timestamp
+                    "timestamp": a.created_at.isoformat(),
+                    "cursor": _page_cursor(a.created_at, a.trx_id),
+                    "author": m.author,
+                    "content": m.content,
+                    "tags": m.tags or [],
+                    "hidden": False,
+                    "pending": True,
+                    "approvals": int(a.approvals),
+                    "quorum": quorum,
+                    "mod_reason": None,
+                },
+            )
         )
 
-    # Apply status filter similar to public audit
-    if status == "hidden":
-        items = [it for it in items if it.get("hidden") is True]
-    elif status == "pending":
-        items = [it for it in items if it.get("pending") is True]
-    else:
-        items = [
-            it
-            for it in items
-            if (it.get("hidden") or it.get("pending") or it.get("mod_reason"))
-        ]
-
-    # Final ordering by moderation timestamp
-    def _pick_ts(x: dict) -> str:
-        return x.get("timestamp") or ""
-
-    items.sort(key=lambda it: _pick_ts(it), reverse=True)
-
-    # Enforce limit
-    items = items[:limit]
+    # Both streams are keyset-ordered, so a bounded merge yields the page
+    items = _merge_mod_streams(hidden_items, pending_items, limit)
 
     return jsonify({"items": items})
 
@@ -849,7 +925,7 @@ def login():
     # Enforce freshness window on the signed message (ISO timestamp)
     try:
         msg_dt = _parse_timestamp(str(message))
-        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        now = _utcnow_naive()
         skew = abs((now - msg_dt).total_seconds())
         max_skew = int(current_app.config.get("LOGIN_MAX_SKEW", 120))
         if skew > max_skew:
@@ -872,10 +948,52 @@ def login():
 
     session["username"] = username
     session.permanent = True
+    # Start each login from a fresh following list
+    cache.delete(_following_cache_key(username))
     return jsonify({"success": True, "username": username})
 
 
+@api_bp.route("/following", methods=["POST"])
+def api_following_update():
+    """Record a follow/unfollow the viewer just broadcast via Keychain."""
+    if "username" not in session:
+        return jsonify({"success": False, "error": "unauthorized"}), 401
+    data = request.get_json(force=True, silent=True) or {}
+    target = data.get("target")
+    target = target.strip().lower() if isinstance(target, str) else ""
+    action = data.get("action")
+    if not _USERNAME_RE.fullmatch(target) or action not in ("follow", "unfollow"):
+        return jsonify({"success": False, "error": "invalid request"}), 400
+    _update_cached_following(session["username"], target, action == "follow")
+    return jsonify({"success": True})
+
+
 # With url_prefix '/api/v1', '/login' is exposed as '/api/v1/login'
+def _hide_approvals(trx_id: str) -> int:
+    """Distinct moderators who approved hiding trx_id since its last unhide.
+
+    The last-unhide cutoff is a scalar subquery, so this is one round trip.
+    """
+    last_unhide = (
+        db.session.query(db.func.max(ModerationAction.created_at))
+        .filter(
+            ModerationAction.trx_id == trx_id,
+            ModerationAction.action == "unhide",
+        )
+        .scalar_subquery()
+    )
+    approvals = (
+        db.session.query(db.func.count(db.distinct(ModerationAction.moderator)))
+        .filter(
+            ModerationAction.trx_id == trx_id,
+            ModerationAction.action == "hide",
+            db.or_(last_unhide.is_(None), ModerationAction.created_at > last_unhide),
+        )
+        .scalar()
+    )
+    return int(approvals or 0)
+
+
 @api_bp.route("/mod/hide", methods=["POST"])
 def mod_hide():
     if "username" not in session:
@@ -900,73 +1018,33 @@ def mod_hide():
         ok, invalid = _verify_signature_and_key(moderator, pubkey, message, sig)
         if not ok:
             return jsonify({"success": False, "error": "bad signature"}), 401
+    now = _utcnow_naive()
     act = ModerationAction(
         trx_id=trx_id,
         moderator=moderator,
         action="hide",
         reason=reason,
-        created_at=_utcnow_naive(),
+        created_at=now,
         sig_message=data.get("message"),
         sig_pubkey=data.get("pubkey"),
         sig_value=data.get("signature"),
     )
     db.session.add(act)
     quorum = int(current_app.config.get("MOD_QUORUM", 1))
-    hidden = False
-    # Determine last unhide cutoff so approvals reset after an unhide
-    last_unhide = (
-        db.session.query(ModerationAction.created_at)
-        .filter(
-            ModerationAction.trx_id == trx_id,
-            ModerationAction.action == "unhide",
+    # Distinct moderators approving hide since the last unhide (the action
+    # added above is flushed first, so it counts)
+    approvals = _hide_approvals(trx_id)
+    hidden = quorum <= 1 or approvals >= quorum
+    if hidden:
+        _upsert_moderation(
+            {
+                "trx_id": trx_id,
+                "visibility": "hidden",
+                "mod_by": moderator,
+                "mod_reason": reason,
+                "mod_at": now,
+            }
         )
-        .order_by(ModerationAction.created_at.desc())
-        .first()
-    )
-    cutoff = last_unhide[0] if last_unhide else None
-    # Count distinct moderators approving hide after cutoff
-    approvals_q = db.session.query(ModerationAction.moderator).filter(
-        ModerationAction.trx_id == trx_id,
-        ModerationAction.action == "hide",
-    )
-    if cutoff is not None:
-        approvals_q = approvals_q.filter(ModerationAction.created_at > cutoff)
-    approvals = approvals_q.distinct().count()
-    if quorum <= 1:
-        mod = Moderation.query.filter_by(trx_id=trx_id).first()
-        if mod is None:
-            mod = Moderation(
-                trx_id=trx_id,
-                visibility="hidden",
-                mod_by=moderator,
-                mod_reason=reason,
-                mod_at=_utcnow_naive(),
-            )
-            db.session.add(mod)
-        else:
-            mod.visibility = "hidden"
-            mod.mod_by = moderator
-            mod.mod_reason = reason
-            mod.mod_at = _utcnow_naive()
-        hidden = True
-    else:
-        if approvals >= quorum:
-            mod = Moderation.query.filter_by(trx_id=trx_id).first()
-            if mod is None:
-                mod = Moderation(
-                    trx_id=trx_id,
-                    visibility="hidden",
-                    mod_by=moderator,
-                    mod_reason=reason,
-                    mod_at=_utcnow_naive(),
-                )
-                db.session.add(mod)
-            else:
-                mod.visibility = "hidden"
-                mod.mod_by = moderator
-                mod.mod_reason = reason
-                mod.mod_at = _utcnow_naive()
-            hidden = True
     db.session.commit()
     return jsonify(
         {"success": True, "hidden": hidden, "quorum": quorum, "approvals": approvals}
@@ -994,22 +1072,27 @@ def mod_unhide():
         ok, invalid = _verify_signature_and_key(moderator, pubkey, message, sig)
         if not ok:
             return jsonify({"success": False, "error": "bad signature"}), 401
+    now = _utcnow_naive()
     act = ModerationAction(
         trx_id=trx_id,
         moderator=moderator,
         action="unhide",
-        created_at=_utcnow_naive(),
+        created_at=now,
         sig_message=data.get("message"),
         sig_pubkey=data.get("pubkey"),
         sig_value=data.get("signature"),
     )
     db.session.add(act)
-    mod = Moderation.query.filter_by(trx_id=trx_id).first()
-    if mod is not None:
-        mod.visibility = "public"
-        mod.mod_by = moderator
-        mod.mod_reason = None
-        mod.mod_at = _utcnow_naive()
+    # Single UPDATE; a trx_id that was never hidden has no row to touch
+    Moderation.query.filter(Moderation.trx_id == trx_id).update(
+        {
+            Moderation.visibility: "public",
+            Moderation.mod_by: moderator,
+            Moderation.mod_reason: None,
+            Moderation.mod_at: now,
+        },
+        synchronize_session=False,
+    )
     db.session.commit()
     return jsonify({"success": True})
 
@@ -1023,64 +1106,19 @@ def api_mod_pending_count():
     if uname not in (current_app.config.get("MODERATORS") or []):
         return jsonify({"count": 0}), 403
 
+    quorum = int(current_app.config.get("MOD_QUORUM", 1))
+    if quorum <= 1:
+        # Every hide takes effect immediately, so nothing is ever pending
+        return jsonify({"count": 0})
+
     # Last seen marker for moderator
-    state = ModerationState.query.get(uname)
+    state = db.session.get(ModerationState, uname)
     last_seen = state.last_seen if state and state.last_seen else None
 
-    quorum = int(current_app.config.get("MOD_QUORUM", 1))
-    count = 0
-
-    # Consider items currently pending quorum
-    # Strategy mirrors mod_audit/mod_list: latest hide approvals since last unhide
-    act_q = (
-        ModerationAction.query.filter(ModerationAction.action == "hide")
-        .order_by(ModerationAction.created_at.desc())
-        .limit(300)
-    )
-    acts = act_q.all()
-    seen_trx = set()
-    for a in acts:
-        if a.trx_id in seen_trx:
-            continue
-        seen_trx.add(a.trx_id)
-        # Skip if already hidden
-        mod = Moderation.query.filter_by(trx_id=a.trx_id).first()
-        if mod and mod.visibility == "hidden":
-            continue
-        # Determine cutoff at last unhide
-        last_unhide = (
-            db.session.query(ModerationAction.created_at)
-            .filter(
-                ModerationAction.trx_id == a.trx_id,
-                ModerationAction.action == "unhide",
-            )
-            .order_by(ModerationAction.created_at.desc())
-            .first()
-        )
-        cutoff = last_unhide[0] if last_unhide else None
-        approvals_q = db.session.query(ModerationAction.moderator).filter(
-            ModerationAction.trx_id == a.trx_id,
-            ModerationAction.action == "hide",
-        )
-        if cutoff is not None:
-            approvals_q = approvals_q.filter(ModerationAction.created_at > cutoff)
-        approvals = approvals_q.distinct().count()
-        pending = (quorum > 1) and (approvals > 0) and (approvals < quorum)
-        if not pending:
-            continue
-        # Latest hide action time
-        hide_actions_q = ModerationAction.query.filter(
-            ModerationAction.trx_id == a.trx_id,
-            ModerationAction.action == "hide",
-        )
-        if cutoff is not None:
-            hide_actions_q = hide_actions_q.filter(ModerationAction.created_at > cutoff)
-        latest_hide = hide_actions_q.order_by(
-            ModerationAction.created_at.desc()
-        ).first()
-        latest_ts = latest_hide.created_at if latest_hide else a.created_at
-        if last_seen is None or (latest_ts and latest_ts > last_seen):
-            count += 1
+    # Posts currently pending quorum, by their latest hide since the last
+    # unhide; the same candidates /mod/list and /mod/audit page through
+    acts = _pending_candidates(None, 300, quorum)
+    count = sum(1 for a in acts if last_seen is None or a.created_at > last_seen)
 
     return jsonify({"count": int(count)})
 
@@ -1093,7 +1131,7 @@ def api_mod_seen():
     if uname not in (current_app.config.get("MODERATORS") or []):
         return jsonify({"success": False}), 403
     now = _utcnow_naive()
-    state = ModerationState.query.get(uname)
+    state = db.session.get(ModerationState, uname)
     if state is None:
         state = ModerationState(username=uname, last_seen=now)
         db.session.add(state)
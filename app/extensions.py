@@ -1,3 +1,38 @@
+import orjson
+from flask.json.provider import DefaultJSONProvider
 from flask_caching import Cache
 
 cache = Cache()
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson.
+
+    Dates, Decimals and other non-native types still go through Flask's
+    default() hook, so responses keep the same shape as stdlib json.
+    """
+
+    _option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+    # Clients read keys by name; skip re-sorting every dict on the way out
+    sort_keys = False
+
+    def _dump_bytes(self, obj, indent: bool = False) -> bytes:
+        option = self._option
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option)
+
+    def dumps(self, obj, **kwargs) -> str:
+        return self._dump_bytes(obj, indent=bool(kwargs.get("indent"))).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(
+            self._dump_bytes(obj, indent=indent) + b"\n", mimetype=self.mimetype
+        )
@@ -1,12 +1,20 @@
-import json
+import functools
 import os
+import re
 import threading
 import time
 from datetime import datetime, timezone
+from urllib.parse import parse_qs, urlparse
 
+import orjson
 from bleach import clean, linkify
-from flask import current_app, jsonify, request
-from markdown import markdown
+from flask import current_app, jsonify, request, session
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import sessionmaker
+from markdown import Markdown
+from markdown.extensions import codehilite
 from nectar.account import Account
 from nectar.hive import Hive
 from nectar.block import Blocks
@@ -14,7 +22,68 @@ from nectargraphenebase.account import PublicKey
 from nectargraphenebase.ecdsasig import verify_message
 
 from .extensions import cache
-from .models import Checkpoint, Message, db
+from .models import (
+    Appreciation,
+    Checkpoint,
+    Message,
+    MessageMention,
+    MessageTag,
+    Moderation,
+    db,
+)
+
+
+def _heart_maps(post_ids: list[str]) -> tuple[dict[str, int], set[str]]:
+    """Heart counts per trx_id and the set the logged-in viewer has hearted."""
+    counts: dict[str, int] = {}
+    viewer_hearts: set[str] = set()
+    if not post_ids:
+        return counts, viewer_hearts
+    rows = (
+        db.session.query(Appreciation.trx_id, db.func.count())
+        .filter(Appreciation.trx_id.in_(post_ids))
+        .group_by(Appreciation.trx_id)
+        .all()
+    )
+    counts = {trx: cnt for trx, cnt in rows}
+    if session.get("username"):
+        viewer = session["username"].lower()
+        you_rows = (
+            db.session.query(Appreciation.trx_id)
+            .filter(Appreciation.trx_id.in_(post_ids))
+            .filter(Appreciation.username == viewer)
+            .all()
+        )
+        viewer_hearts = {r[0] for r in you_rows}
+    return counts, viewer_hearts
+
+
+# Columns the post serializers read; API and page views select these as plain
+# rows instead of materializing Message instances.
+_MESSAGE_COLS = (
+    Message.id,
+    Message.trx_id,
+    Message.block_num,
+    Message.timestamp,
+    Message.author,
+    Message.type,
+    Message.content,
+    Message.html,
+    Message.mentions,
+    Message.tags,
+    Message.reply_to,
+)
+
+
+def _not_hidden():
+    """Filter excluding hidden posts, as a NOT EXISTS anti-join on moderation.
+
+    Planners run this as an anti-join probing moderation's primary key,
+    instead of materializing every hidden trx_id for a NOT IN list.
+    """
+    return ~db.exists().where(
+        Moderation.trx_id == Message.trx_id, Moderation.visibility == "hidden"
+    )
 
 
 def _utcnow_naive() -> datetime:
@@ -29,6 +98,40 @@ def _to_naive_utc(dt: datetime) -> datetime:
     return dt.astimezone(timezone.utc).replace(tzinfo=None)
 
 
+# Patterns used by the renderer and ingest; compiled once at import
+# @mention or #tag after start/whitespace; group 2 = username, group 3 = tag
+_LINKIFY_RE = re.compile(r"(^|\s)(?:@([a-z0-9\-.]+)|#([a-z0-9\-]+))")
+# Either a full codehilite wrapper or a standalone <pre> block
+_CODE_BLOCK_RE = re.compile(
+    r"(<div[^>]*class=\"[^\"]*codehilite[^\"]*\"[^>]*>[\s\S]*?<\/div>|<pre[\s\S]*?>[\s\S]*?<\/pre>)",
+    re.IGNORECASE,
+)
+_IMG_NO_LOADING_RE = re.compile(r"<img(?![^>]*\bloading=)([^>]*)>")
+_ANCHOR_NO_REL_RE = re.compile(r"<a\b(?![^>]*\brel=)[^>]*>")
+_ANCHOR_HREF_RE = re.compile(r'<a\s+[^>]*href="([^"]+)"[^>]*>[^<]*<\/a>')
+_YOUTUBE_ID_RE = re.compile(r"^[a-zA-Z0-9_-]{11}$")
+# Anywhere in lowered text; group 1 = username, group 2 = tag
+_EXTRACT_TERMS_RE = re.compile(r"@([a-z0-9][a-z0-9\-\.]{1,31})|#([a-z0-9_\-]{1,32})")
+_SYNTHETIC_TRX_RE = re.compile(r"\d+-\d+-\d+")
+# A whole lowercased account name, as accepted by the mention extractor
+_USERNAME_RE = re.compile(r"[a-z0-9][a-z0-9\-\.]{1,31}")
+
+# Pygments lexer lookup scans the whole lexer registry on every code block;
+# lexers are stateless, so reuse one instance per (alias, options).
+_lexer_by_name = functools.lru_cache(maxsize=64)(codehilite.get_lexer_by_name)
+
+
+def _cached_get_lexer_by_name(alias, **options):
+    try:
+        return _lexer_by_name(alias, **options)
+    except TypeError:  # unhashable option values (e.g. hl_lines)
+        return codehilite.get_lexer_by_name(alias, **options)
+
+
+if codehilite.pygments:
+    codehilite.get_lexer_by_name = _cached_get_lexer_by_name
+
+
 def markdown_render(content: str) -> str:
     """Render user content as sanitized HTML (minimal subset).
     - Convert simple @mentions and #tags to links before Markdown.
@@ -36,26 +139,37 @@ def markdown_render(content: str) -> str:
     - Sanitize with Bleach allowing only basic inline formatting, links, images,
       code (inline/pre), and blockquotes. No headings, lists, tables, or complex blocks.
     """
-    try:
-        txt = content or ""
-        # Pre-linkify mentions/tags using Markdown link syntax to preserve formatting
-        import re
+    return _with_youtube_previews(_render_html(content or ""))
 
-        def _mention_sub(m):
-            u = (m.group(2) or "").lower()
-            return f"{m.group(1)}[@{u}](/u/{u})"
 
-        def _tag_sub(m):
-            t = (m.group(2) or "").lower()
-            return f"{m.group(1)}[#{t}](/feed?tag={t})"
+def message_html(m, max_len: int | None = None) -> str:
+    """HTML for a Message, using the copy rendered at ingest when it applies.
+
+    Content longer than max_len is rendered from the truncated text instead.
+    """
+    content = m.content or ""
+    if max_len is not None and len(content) > max_len:
+        return markdown_render(content[:max_len])
+    if m.html is None:
+        return markdown_render(content)
+    return _with_youtube_previews(m.html)
+
+
+_md_local = threading.local()
+
 
-        txt = re.sub(r"(^|\s)@([a-z0-9\-.]+)", _mention_sub, txt)
-        txt = re.sub(r"(^|\s)#([a-z0-9\-]+)", _tag_sub, txt)
+def _get_markdown() -> Markdown:
+    """This thread's Markdown converter, built once with our extensions.
 
+    Constructing Markdown registers every extension again, so reuse one
+    instance per thread (instances are not thread-safe) and reset() it
+    between documents.
+    """
+    md = getattr(_md_local, "md", None)
+    if md is None:
         # Render Markdown with minimal extensions
         # We avoid 'extra' (tables/fenced code), 'admonition', and other heavy features.
-        html = markdown(
-            txt,
+        md = Markdown(
             extensions=[
                 "fenced_code",
                 "codehilite",  # syntax highlighting via Pygments
@@ -71,6 +185,32 @@ def markdown_render(content: str) -> str:
             },
             output_format="html5",
         )
+        _md_local.md = md
+    return md
+
+
+@functools.lru_cache(maxsize=4096)
+def _render_html(content: str) -> str:
+    """Sanitized HTML for content, without YouTube previews.
+
+    This is what gets stored in Message.html. Messages are immutable, so the
+    result is also memoized per content string.
+    """
+    try:
+        txt = content or ""
+
+        # Pre-linkify mentions/tags using Markdown link syntax to preserve formatting
+        def _link_sub(m):
+            u = m.group(2)
+            if u is not None:
+                u = u.lower()
+                return f"{m.group(1)}[@{u}](/u/{u})"
+            t = m.group(3).lower()
+            return f"{m.group(1)}[#{t}](/feed?tag={t})"
+
+        txt = _LINKIFY_RE.sub(_link_sub, txt)
+
+        html = _get_markdown().reset().convert(txt)
         # Sanitize HTML
         allowed_tags = {
             "p",
@@ -104,7 +244,6 @@ def markdown_render(content: str) -> str:
         )
         # Auto-link bare URLs safely, but skip entire code blocks to preserve structure
         try:
-            import re as _re_link
 
             def _linkify_segment(segment: str) -> str:
                 try:
@@ -112,12 +251,7 @@ def markdown_render(content: str) -> str:
                 except Exception:
                     return segment
 
-            # Match either a full codehilite wrapper or a standalone <pre> block
-            code_pattern = _re_link.compile(
-                r"(<div[^>]*class=\"[^\"]*codehilite[^\"]*\"[^>]*>[\s\S]*?<\/div>|<pre[\s\S]*?>[\s\S]*?<\/pre>)",
-                _re_link.IGNORECASE,
-            )
-            tokens = code_pattern.split(safe)
+            tokens = _CODE_BLOCK_RE.split(safe)
             # tokens alternates: [non-code, code, non-code, code, ...]
             for i in range(0, len(tokens)):
                 if i % 2 == 0:  # non-code segment
@@ -128,17 +262,12 @@ def markdown_render(content: str) -> str:
 
         # Ensure images are lazy-loaded by default
         try:
-            import re as _re
-
-            safe = _re.sub(
-                r"<img(?![^>]*\bloading=)([^>]*)>", r'<img loading="lazy"\1>', safe
-            )
+            safe = _IMG_NO_LOADING_RE.sub(r'<img loading="lazy"\1>', safe)
         except Exception:
             pass
 
         # Enforce rel on all anchors for safety
         try:
-            import re as _re2
 
             def _add_rel(m):
                 tag_open = m.group(0)
@@ -147,78 +276,9 @@ def markdown_render(content: str) -> str:
                     return tag_open
                 return tag_open[:-1] + ' rel="nofollow noopener noreferrer">'
 
-            safe = _re2.sub(r"<a\b(?![^>]*\brel=)[^>]*>", _add_rel, safe)
+            safe = _ANCHOR_NO_REL_RE.sub(_add_rel, safe)
         except Exception:
             pass
-        # Replace valid YouTube links with a lightweight preview block (feature-flagged)
-        try:
-            from flask import current_app as _curr_app
-
-            if not (_curr_app and _curr_app.config.get("YOUTUBE_PREVIEW", False)):
-                # Feature disabled: return sanitized HTML as-is
-                return safe
-            import re as _reyt
-            from urllib.parse import urlparse, parse_qs
-
-            VALID_HOSTS = {
-                "www.youtube.com",
-                "youtube.com",
-                "m.youtube.com",
-                "youtu.be",
-            }
-
-            def _extract_vid(url: str) -> str | None:
-                try:
-                    p = urlparse(url)
-                    if p.netloc not in VALID_HOSTS:
-                        return None
-                    vid = None
-                    if p.netloc == "youtu.be":
-                        vid = p.path.lstrip("/")
-                    elif p.path.startswith("/shorts/"):
-                        parts = p.path.split("/")
-                        vid = parts[2] if len(parts) > 2 else None
-                    elif p.path.startswith("/embed/"):
-                        parts = p.path.split("/")
-                        vid = parts[2] if len(parts) > 2 else None
-                    else:
-                        q = parse_qs(p.query)
-                        vid = (q.get("v") or [None])[0]
-                    if vid and _reyt.match(r"^[a-zA-Z0-9_-]{11}$", vid):
-                        return vid
-                    return None
-                except Exception:
-                    return None
-
-            def _preview_html(video_id: str) -> str:
-                thumb = f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg"
-                embed = f"https://www.youtube.com/embed/{video_id}?autoplay=1"
-                return (
-                    '<div class="youtubePreview" role="button" tabindex="0" '
-                    f'data-video-url="{embed}">'  # handled by JS click listener
-                    "<div>"
-                    f'<img class="youtubeThumbnail" src="{thumb}" alt="YouTube video thumbnail" loading="lazy" />'
-                    "</div>"
-                    '<div class="playButton">'
-                    '<svg class="playIcon" width="68" height="48" viewBox="0 0 68 48" aria-hidden="true">'
-                    '<path d="M66.52,7.74c-0.78-2.93-2.49-5.41-5.42-6.19C55.79,.13,34,0,34,0S12.21,.13,6.9,1.55 C3.97,2.33,2.27,4.81,1.48,7.74C0.06,13.05,0,24,0,24s0.06,10.95,1.48,16.26c0.78,2.93,2.49,5.41,5.42,6.19 C12.21,47.87,34,48,34,48s21.79-0.13,27.1-1.55c2.93-0.78,4.64-3.26,5.42-6.19C67.94,34.95,68,24,68,24S67.94,13.05,66.52,7.74z" fill="#f00"/>'
-                    '<path d="M45,24 27,14 27,34" fill="#fff"/></svg>'
-                    "</div>"
-                    "</div>"
-                )
-
-            # Replace anchors that point to YouTube with preview markup
-            def _replace_anchor(m):
-                href = m.group(1)
-                vid = _extract_vid(href)
-                return _preview_html(vid) if vid else m.group(0)
-
-            safe = _reyt.sub(
-                r'<a\s+[^>]*href="([^"]+)"[^>]*>[^<]*<\/a>', _replace_anchor, safe
-            )
-        except Exception:
-            pass
-
         return safe
     except Exception:
         # Fallback: escape everything via bleach
@@ -228,6 +288,81 @@ def markdown_render(content: str) -> str:
             return ""
 
 
+_YOUTUBE_HOSTS = {
+    "www.youtube.com",
+    "youtube.com",
+    "m.youtube.com",
+    "youtu.be",
+}
+
+
+def _extract_youtube_id(url: str) -> str | None:
+    try:
+        p = urlparse(url)
+        if p.netloc not in _YOUTUBE_HOSTS:
+            return None
+        vid = None
+        if p.netloc == "youtu.be":
+            vid = p.path.lstrip("/")
+        elif p.path.startswith("/shorts/"):
+            parts = p.path.split("/")
+            vid = parts[2] if len(parts) > 2 else None
+        elif p.path.startswith("/embed/"):
+            parts = p.path.split("/")
+            vid = parts[2] if len(parts) > 2 else None
+        else:
+            q = parse_qs(p.query)
+            vid = (q.get("v") or [None])[0]
+        if vid and _YOUTUBE_ID_RE.match(vid):
+            return vid
+        return None
+    except Exception:
+        return None
+
+
+def _youtube_preview_html(video_id: str) -> str:
+    thumb = f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg"
+    embed = f"https://www.youtube.com/embed/{video_id}?autoplay=1"
+    return (
+        '<div class="youtubePreview" role="button" tabindex="0" '
+        f'data-video-url="{embed}">'  # handled by JS click listener
+        "<div>"
+        f'<img class="youtubeThumbnail" src="{thumb}" alt="YouTube video thumbnail" loading="lazy" />'
+        "</div>"
+        '<div class="playButton">'
+        '<svg class="playIcon" width="68" height="48" viewBox="0 0 68 48" aria-hidden="true">'
+        '<path d="M66.52,7.74c-0.78-2.93-2.49-5.41-5.42-6.19C55.79,.13,34,0,34,0S12.21,.13,6.9,1.55 C3.97,2.33,2.27,4.81,1.48,7.74C0.06,13.05,0,24,0,24s0.06,10.95,1.48,16.26c0.78,2.93,2.49,5.41,5.42,6.19 C12.21,47.87,34,48,34,48s21.79-0.13,27.1-1.55c2.93-0.78,4.64-3.26,5.42-6.19C67.94,34.95,68,24,68,24S67.94,13.05,66.52,7.74z" fill="#f00"/>'
+        '<path d="M45,24 27,14 27,34" fill="#fff"/></svg>'
+        "</div>"
+        "</div>"
+    )
+
+
+def _replace_youtube_anchor(m):
+    vid = _extract_youtube_id(m.group(1))
+    return _youtube_preview_html(vid) if vid else m.group(0)
+
+
+@functools.lru_cache(maxsize=4096)
+def _youtube_previews(safe: str) -> str:
+    """Sanitized HTML with YouTube anchors swapped for previews (memoized)."""
+    if "youtu" not in safe:
+        return safe
+    return _ANCHOR_HREF_RE.sub(_replace_youtube_anchor, safe)
+
+
+def _with_youtube_previews(safe: str) -> str:
+    """Replace valid YouTube links with a lightweight preview block (feature-flagged)."""
+    try:
+        if not current_app.config.get("YOUTUBE_PREVIEW", False):
+            # Feature disabled: return sanitized HTML as-is
+            return safe
+        safe = _youtube_previews(safe)
+    except Exception:
+        pass
+    return safe
+
+
 def _get_hive_instance():
     """Return a Hive instance (uses shared instance if configured)."""
     try:
@@ -291,7 +426,7 @@ def _ops_map_for_block(
                     continue
                 if isinstance(pl, str):
                     try:
-                        pl = json.loads(pl)
+                        pl = orjson.loads(pl)
                     except Exception:
                         pl = {}
                 if not isinstance(pl, dict):
@@ -306,7 +441,7 @@ def _ops_map_for_block(
                 body = pl.get("json")
                 if isinstance(body, str):
                     try:
-                        body = json.loads(body)
+                        body = orjson.loads(body)
                     except Exception:
                         body = None
                 if not isinstance(body, dict) or body.get("type") != "post":
@@ -373,7 +508,7 @@ def _ops_map_for_block(
                         body = fp.get("json")
                         if isinstance(body, str):
                             try:
-                                body = json.loads(body)
+                                body = orjson.loads(body)
                             except Exception:
                                 body = None
                         if not isinstance(body, dict) or body.get("type") != "post":
@@ -413,16 +548,27 @@ def _extract_trx_id_from_bulk_op(op: dict | None, payload: dict | None) -> str |
     return None
 
 
+# Seconds to keep an empty following set after a failed RPC fetch
+FOLLOWING_ERROR_TTL = 30
+
+
+def _following_cache_key(username: str) -> str:
+    return f"following:{(username or '').strip().lower()}"
+
+
 def _get_following_usernames(username: str) -> set[str]:
-    """Fetch following set from chain using condenser API and cache it briefly.
+    """Fetch following set from chain using condenser API and cache it.
     Username normalization is important: Hive accounts are lowercase.
+    Failed fetches are cached as an empty set only briefly so RPC errors are
+    not hammered but also do not stick.
     """
     uname = (username or "").strip().lower()
-    cache_key = f"following:{uname}"
+    cache_key = _following_cache_key(uname)
     cached = cache.get(cache_key)
     if cached is not None:
         return cached
     following: set[str] = set()
+    failed = False
     try:
         current_app.logger.info(
             "[following] fetching for user=%s via nectar.Account.get_following()", uname
@@ -442,6 +588,7 @@ def _get_following_usernames(username: str) -> set[str]:
         except Exception:
             pass
         resp = []
+        failed = True
 
     # Normalize response to a lowercase set of usernames
     try:
@@ -465,10 +612,64 @@ def _get_following_usernames(username: str) -> set[str]:
         )
     except Exception:
         pass
-    cache.set(cache_key, following, timeout=60)
+    timeout = (
+        FOLLOWING_ERROR_TTL
+        if failed
+        else current_app.config.get("FOLLOWING_CACHE_TTL", 300)
+    )
+    cache.set(cache_key, following, timeout=timeout)
     return following
 
 
+PROFILE_META_TTL = 120
+
+
+def _get_profile_meta(username: str) -> tuple[object, dict]:
+    """(posting/json metadata, its profile dict) for an account, cached briefly.
+
+    Profile metadata changes rarely, so profile views skip the Hive RPC while
+    the entry is fresh. Hive account names are lowercase, so /u/Alice and
+    /u/alice share an entry. Lookup errors propagate and are not cached.
+    """
+    uname = (username or "").strip().lower()
+    cache_key = f"profile_meta:{uname}"
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+    account = Account(uname)
+    meta = account.get("posting_json_metadata") or account.get("json_metadata") or {}
+    if isinstance(meta, str):
+        try:
+            meta = orjson.loads(meta)
+        except Exception:
+            meta = {}
+    prof = meta.get("profile") if isinstance(meta, dict) else {}
+    if not isinstance(prof, dict):
+        prof = {}
+    cache.set(cache_key, (meta, prof), timeout=PROFILE_META_TTL)
+    return meta, prof
+
+
+def _update_cached_following(username: str, target: str, follow: bool) -> None:
+    """Apply a follow/unfollow the user just broadcast to their cached set.
+
+    The chain takes a block or two to reflect it, so patching the cached set
+    keeps the UI consistent without dropping the cache and re-fetching early.
+    """
+    cache_key = _following_cache_key(username)
+    cached = cache.get(cache_key)
+    if cached is None:
+        return
+    following = set(cached)
+    if follow:
+        following.add(target)
+    else:
+        following.discard(target)
+    cache.set(
+        cache_key, following, timeout=current_app.config.get("FOLLOWING_CACHE_TTL", 300)
+    )
+
+
 def _parse_timestamp(ts: str) -> datetime:
     # Handle "2025-08-18T15:30:00" or with trailing 'Z'
     if ts.endswith("Z"):
@@ -487,13 +688,15 @@ def _extract_mentions_tags(content: str) -> tuple[list[str], list[str]]:
     Tags: words after # with letters/digits/underscore/hyphen, up to 32 chars
     """
     try:
-        import re
-
         # Hive usernames: 3-16 chars, but we capture liberally then normalize
-        mention_pat = re.compile(r"@([a-z0-9][a-z0-9\-\.]{1,31})")
-        tag_pat = re.compile(r"#([a-z0-9_\-]{1,32})")
-        mentions = {m.lower().strip("-.") for m in mention_pat.findall(content.lower())}
-        tags = {t.lower().strip("-_") for t in tag_pat.findall(content.lower())}
+        mentions = set()
+        tags = set()
+        # One scan for both kinds; the character sets cannot overlap
+        for m, t in _EXTRACT_TERMS_RE.findall(content.lower()):
+            if m:
+                mentions.add(m.strip("-."))
+            else:
+                tags.add(t.strip("-_"))
         # Basic sanity filters
         mentions = {m for m in mentions if 2 <= len(m) <= 32}
         tags = {t for t in tags if 1 <= len(t) <= 32}
@@ -502,7 +705,20 @@ def _extract_mentions_tags(content: str) -> tuple[list[str], list[str]]:
         return [], []
 
 
-def _ingest_custom_json_op(
+def _normalize_terms(values) -> list[str]:
+    """Lowercased, de-duplicated usernames/tags that fit the association tables."""
+    if not isinstance(values, (list, tuple, set)):
+        return []
+    out = set()
+    for v in values:
+        if isinstance(v, str):
+            v = v.strip().lower()
+            if 1 <= len(v) <= 32:
+                out.add(v)
+    return sorted(out)
+
+
+def _message_row_from_op(
     block_num: int,
     dt: datetime,
     payload: dict,
@@ -510,10 +726,11 @@ def _ingest_custom_json_op(
     op_idx: int,
     trx_id_override: str | None = None,
     seen_ids: set[str] | None = None,
-) -> int:
-    """Ingest a single custom_json op for our app ID. Returns 1 if inserted, else 0.
+) -> dict | None:
+    """Build the messages row for a single custom_json op for our app ID.
 
-    This mirrors the logic inside _ingest_block() so bulk and single-block paths stay consistent.
+    Returns None when the op is skipped. Bulk and single-block paths both collect
+    rows through here and write them with _insert_message_rows().
     """
     try:
         # Determine author from required posting auths
@@ -521,24 +738,24 @@ def _ingest_custom_json_op(
         ra = payload.get("required_auths", []) or []
         author = rpa[0] if rpa else (ra[0] if ra else None)
         if not author:
-            return 0
+            return None
 
         # Parse json payload (string or dict)
         body = payload.get("json")
         if isinstance(body, str):
             try:
-                body = json.loads(body)
+                body = orjson.loads(body)
             except Exception:
-                return 0
+                return None
         if not isinstance(body, dict):
-            return 0
+            return None
         if body.get("type") != "post":
             # v1 implements only posts; ignore others
-            return 0
+            return None
 
         content = body.get("content", "").strip()
         if not content:
-            return 0
+            return None
 
         # Mentions/tags: derive from content when not provided
         mentions = body.get("mentions") or []
@@ -560,9 +777,7 @@ def _ingest_custom_json_op(
         )
         # Require real transaction hash; skip synthetic fallback like "block-tx-op"
         try:
-            import re as _re_syn
-
-            if isinstance(trx_id, str) and _re_syn.fullmatch(r"\d+-\d+-\d+", trx_id):
+            if isinstance(trx_id, str) and _SYNTHETIC_TRX_RE.fullmatch(trx_id):
                 try:
                     current_app.logger.warning(
                         "[ingest] skipping synthetic trx_id=%s at block=%s (need real transaction hash)",
@@ -571,31 +786,27 @@ def _ingest_custom_json_op(
                     )
                 except Exception:
                     pass
-                return 0
+                return None
         except Exception:
             pass
         # Prevent duplicates within the same transaction/batch
         if seen_ids is not None and trx_id in seen_ids:
-            return 0
-        # Skip if already in DB
-        if Message.query.filter_by(trx_id=trx_id).first():
-            return 0
-        m = Message(
-            trx_id=trx_id,
-            block_num=block_num,
-            timestamp=dt,
-            author=author,
-            type="post",
-            content=content,
-            mentions=json.dumps(mentions) if mentions else None,
-            tags=json.dumps(tags) if tags else None,
-            reply_to=reply_to,
-            raw_json=json.dumps(body),
-        )
-        db.session.add(m)
+            return None
         if seen_ids is not None:
             seen_ids.add(trx_id)
-        return 1
+        return {
+            "trx_id": trx_id,
+            "block_num": block_num,
+            "timestamp": dt,
+            "author": author,
+            "type": "post",
+            "content": content,
+            "mentions": mentions or None,
+            "tags": tags or None,
+            "reply_to": reply_to,
+            "raw_json": body,
+            "html": _render_html(content),
+        }
     except Exception as e:
         try:
             current_app.logger.exception(
@@ -607,17 +818,197 @@ def _ingest_custom_json_op(
             )
         except Exception:
             pass
+        return None
+
+
+def _insert_ignoring_duplicates(model, session=None, index_elements=("trx_id",)):
+    """INSERT that skips rows colliding on index_elements (SQLite/Postgres)."""
+    dialect = (session or db.session).get_bind().dialect.name
+    cols = list(index_elements)
+    if dialect == "postgresql":
+        return pg_insert(model).on_conflict_do_nothing(index_elements=cols)
+    if dialect == "sqlite":
+        return sqlite_insert(model).on_conflict_do_nothing(index_elements=cols)
+    return insert(model)
+
+
+def _upsert_moderation(values: dict) -> None:
+    """Insert or update the Moderation row for values["trx_id"]. No commit.
+
+    One INSERT ... ON CONFLICT DO UPDATE on SQLite/Postgres; other databases
+    fall back to load-then-write.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        ins = pg_insert if dialect == "postgresql" else sqlite_insert
+        stmt = ins(Moderation).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["trx_id"],
+            set_={k: stmt.excluded[k] for k in values if k != "trx_id"},
+        )
+        db.session.execute(stmt)
+        return
+    mod = db.session.get(Moderation, values["trx_id"])
+    if mod is None:
+        db.session.add(Moderation(**values))
+    else:
+        for k, v in values.items():
+            setattr(mod, k, v)
+
+
+def _insert_message_rows(rows: list[dict], session=None) -> int:
+    """Insert message rows (plus their mention/tag rows) in bulk. No commit.
+
+    One SELECT drops trx_ids already stored, then one executemany INSERT writes
+    the rest; rows that still collide with a concurrent writer are skipped by
+    the database. Returns the number of messages inserted.
+    """
+    if not rows:
         return 0
+    session = session or db.session
+    try:
+        existing = set(
+            session.execute(
+                select(Message.trx_id).where(
+                    Message.trx_id.in_([r["trx_id"] for r in rows])
+                )
+            ).scalars()
+        )
+        new_rows = [r for r in rows if r["trx_id"] not in existing]
+        if not new_rows:
+            return 0
+        inserted = session.execute(
+            _insert_ignoring_duplicates(Message, session).returning(
+                Message.id, Message.trx_id
+            ),
+            new_rows,
+        ).all()
+        by_trx = {r["trx_id"]: r for r in new_rows}
+        mention_rows = []
+        tag_rows = []
+        for message_id, trx_id in inserted:
+            row = by_trx[trx_id]
+            ts = row["timestamp"]
+            mention_rows.extend(
+                {"message_id": message_id, "username": u, "timestamp": ts}
+                for u in _normalize_terms(row["mentions"])
+            )
+            tag_rows.extend(
+                {"message_id": message_id, "tag": t, "timestamp": ts}
+                for t in _normalize_terms(row["tags"])
+            )
+        if mention_rows:
+            session.execute(insert(MessageMention), mention_rows)
+        if tag_rows:
+            session.execute(insert(MessageTag), tag_rows)
+        return len(inserted)
+    except Exception:
+        # Leave the session usable; the caller's batch is retried from the checkpoint
+        session.rollback()
+        raise
+
+
+# Set once the per-block get_block fallback has been logged as a warning
+_block_range_fallback_warned = False
 
 
-def _ingest_block(hv: Hive, block_num: int):
-    blk = hv.rpc.get_block(block_num)
+def _get_block_range(hv: Hive, start: int, end: int) -> list[tuple[int, dict]]:
+    """Fetch blocks start..end (inclusive) as [(block_num, block), ...].
+
+    Uses one block_api.get_block_range call for the whole span; falls back to
+    per-block get_block when the node rejects or returns nothing for it.
+    """
+    global _block_range_fallback_warned
+    count = end - start + 1
+    if count <= 0:
+        return []
+    error = None
+    try:
+        resp = hv.rpc.get_block_range(
+            {"starting_block_num": start, "count": count}, api="block_api"
+        )
+        blocks = resp.get("blocks", []) if isinstance(resp, dict) else resp
+        if blocks:
+            out = []
+            for i, blk in enumerate(blocks):
+                try:
+                    bn = int(str(blk.get("block_id"))[:8], 16)
+                except Exception:
+                    bn = start + i
+                out.append((bn, blk))
+            return out
+    except Exception as e:
+        error = e
+    try:
+        if not _block_range_fallback_warned:
+            # Once per process: a node without block_api makes every batch
+            # take this path, which is one RPC per block
+            _block_range_fallback_warned = True
+            current_app.logger.warning(
+                "[watcher] block_api.get_block_range unavailable (%s); "
+                "falling back to per-block get_block",
+                error or "empty result",
+            )
+        else:
+            current_app.logger.debug(
+                "[watcher] get_block_range %s+%s failed; using get_block", start, count
+            )
+    except Exception:
+        pass
+    return [(bn, hv.rpc.get_block(bn)) for bn in range(start, end + 1)]
+
+
+def _ingest_block(hv: Hive, block_num: int, session=None):
+    session = session or db.session
+    inserted = _ingest_block_dict(hv.rpc.get_block(block_num), block_num, session)
+    if inserted:
+        try:
+            session.commit()
+        except Exception:
+            try:
+                session.rollback()
+            except Exception:
+                pass
+    return inserted
+
+
+def _ingest_block_dict(blk: dict | None, block_num: int, session=None) -> int:
+    """Ingest our app's custom_json ops from an already fetched block (no commit)."""
+    inserted = _insert_message_rows(_block_message_rows(blk, block_num), session)
+    if inserted:
+        try:
+            current_app.logger.debug(
+                "[ingest] block=%s inserted_ops=%s", block_num, inserted
+            )
+        except Exception:
+            pass
+    return inserted
+
+
+@functools.lru_cache(maxsize=8)
+def _json_needle(app_id: str) -> bytes:
+    """APP_ID as it appears inside serialized JSON (quotes/escapes applied)."""
+    return orjson.dumps(app_id)
+
+
+def _block_message_rows(blk: dict | None, block_num: int) -> list[dict]:
+    """Message rows for our app's custom_json ops in an already fetched block."""
     if not blk:
-        return 0
+        return []
     # Unwrap if nested (e.g. from get_block)
     if "block" in blk:
         blk = blk["block"]
 
+    app_id = current_app.config["APP_ID"]
+    # Fast path: almost no block mentions our app id anywhere, so one C-level
+    # serialize + substring scan lets us skip walking every tx/op in Python.
+    try:
+        if _json_needle(app_id) not in orjson.dumps(blk):
+            return []
+    except Exception:
+        # Non-JSON values (e.g. datetime objects) - fall back to the op walk
+        pass
+
     ts = blk.get("timestamp")
     if isinstance(ts, datetime):
         dt = _to_naive_utc(ts)
@@ -626,7 +1017,7 @@ def _ingest_block(hv: Hive, block_num: int):
     else:
         dt = _utcnow_naive()
     txs = blk.get("transactions", [])
-    inserted = 0
+    rows = []
     seen_ids: set[str] = set()
     for tx_idx, tx in enumerate(txs):
         # Operations are typically [[op_type, op_payload], ...]
@@ -647,7 +1038,7 @@ def _ingest_block(hv: Hive, block_num: int):
                     op_type = op_type[:-10]
                 if op_type != "custom_json":
                     continue
-                if payload.get("id") != current_app.config["APP_ID"]:
+                if payload.get("id") != app_id:
                     continue
                 # Prefer the real transaction hash from the tx envelope when available
                 tx_hash = tx.get("transaction_id")
@@ -658,7 +1049,7 @@ def _ingest_block(hv: Hive, block_num: int):
                             tx_hash = tx_ids[tx_idx]
                     except Exception:
                         tx_hash = None
-                inserted += _ingest_custom_json_op(
+                row = _message_row_from_op(
                     block_num=block_num,
                     dt=dt,
                     payload=payload,
@@ -667,23 +1058,36 @@ def _ingest_block(hv: Hive, block_num: int):
                     trx_id_override=tx_hash,
                     seen_ids=seen_ids,
                 )
+                if row:
+                    rows.append(row)
             except Exception:
                 # Skip malformed ops but continue
                 continue
+    return rows
+
+
+def _ingest_batch(hv: Hive, session, ck, start: int, end: int) -> int:
+    """Ingest blocks start..end in one transaction with the checkpoint.
+
+    One RPC fetches the span, one executemany writes every message in it, and
+    the checkpoint advances in the same commit, so it never runs ahead of the
+    stored rows.
+    """
+    rows = []
+    last = ck.last_block
+    for bn, blk in _get_block_range(hv, start, end):
+        rows.extend(_block_message_rows(blk, bn))
+        last = bn
+    inserted = _insert_message_rows(rows, session)
+    ck.last_block = last
+    session.commit()
     if inserted:
         try:
             current_app.logger.debug(
-                "[ingest] block=%s inserted_ops=%s", block_num, inserted
+                "[ingest] blocks=%s..%s inserted_ops=%s", start, last, inserted
             )
         except Exception:
             pass
-        try:
-            db.session.commit()
-        except Exception:
-            try:
-                db.session.rollback()
-            except Exception:
-                pass
     return inserted
 
 
@@ -692,19 +1096,21 @@ def _watcher_loop(app, stop_event: threading.Event, poll_interval: float = 3.0):
 
     Accepts a Flask `app` instance to create an application context inside
     the thread. This avoids relying on an imported global like `main.app`.
+
+    Ingest runs on a dedicated session that is closed after every batch, so
+    the long-lived loop never accumulates identity-map state, and commits do
+    not expire the checkpoint row (no reload SELECT per batch).
     """
     hv = _get_hive_instance()
     with app.app_context():
-        from .models import db
-
-        # Ensure tables exist
-        db.create_all()
+        session = sessionmaker(bind=db.engine, expire_on_commit=False)()
+        # Tables are created by create_app() before the watcher starts
         # Get or create checkpoint row with id=1
-        ck = Checkpoint.query.get(1)
+        ck = session.get(Checkpoint, 1)
         if ck is None:
             ck = Checkpoint(id=1, last_block=0)
-            db.session.add(ck)
-            db.session.commit()
+            session.add(ck)
+            session.commit()
         try:
             current_app.logger.info(
                 "[watcher] loop started (poll_interval=%.2fs)", poll_interval
@@ -713,6 +1119,8 @@ def _watcher_loop(app, stop_event: threading.Event, poll_interval: float = 3.0):
             pass
         while not stop_event.is_set():
             try:
+                # Re-attach the checkpoint closed out of the previous batch
+                session.add(ck)
                 head = _get_head_block_num(hv) or 0
                 next_block = (
                     ck.last_block + 1
@@ -825,7 +1233,7 @@ def _watcher_loop(app, stop_event: threading.Event, poll_interval: float = 3.0):
                                     pbody = payload.get("json")
                                     if isinstance(pbody, str):
                                         try:
-                                            pbody = json.loads(pbody)
+                                            pbody = orjson.loads(pbody)
                                         except Exception:
                                             pbody = None
                                     if (
@@ -850,7 +1258,7 @@ def _watcher_loop(app, stop_event: threading.Event, poll_interval: float = 3.0):
                                 except Exception:
                                     continue
 
-                            inserted_this_block = 0
+                            rows = []
                             if pending_ops:
                                 needs_lookup = any(
                                     entry["trx_id"] is None for entry in pending_ops
@@ -881,7 +1289,7 @@ def _watcher_loop(app, stop_event: threading.Event, poll_interval: float = 3.0):
                                         ] < len(app_tx_ids):
                                             entry["trx_id"] = app_tx_ids[entry["seq"]]
 
-                                    inserted = _ingest_custom_json_op(
+                                    row = _message_row_from_op(
                                         block_num=bn,
                                         dt=dt,
                                         payload=entry["payload"],
@@ -890,16 +1298,9 @@ def _watcher_loop(app, stop_event: threading.Event, poll_interval: float = 3.0):
                                         trx_id_override=entry.get("trx_id"),
                                         seen_ids=seen_ids_block,
                                     )
-                                    if inserted:
-                                        if entry["seq"] % 200 == 0:
-                                            try:
-                                                db.session.commit()
-                                            except Exception:
-                                                try:
-                                                    db.session.rollback()
-                                                except Exception:
-                                                    pass
-                                        inserted_this_block += inserted
+                                    if row:
+                                        rows.append(row)
+                            inserted_this_block = _insert_message_rows(rows, session)
 
                             ck.last_block = bn
                             processed_blocks += 1
@@ -914,10 +1315,10 @@ def _watcher_loop(app, stop_event: threading.Event, poll_interval: float = 3.0):
                                 pass
                             # Commit at end of each block in bulk mode
                             try:
-                                db.session.commit()
+                                session.commit()
                             except Exception:
                                 try:
-                                    db.session.rollback()
+                                    session.rollback()
                                 except Exception:
                                     pass
                         try:
@@ -938,10 +1339,7 @@ def _watcher_loop(app, stop_event: threading.Event, poll_interval: float = 3.0):
                         except Exception:
                             pass
                         batch_end = min(head, next_block + 50)
-                        for bn in range(next_block, batch_end + 1):
-                            _ingest_block(hv, bn)
-                            ck.last_block = bn
-                        db.session.commit()
+                        _ingest_batch(hv, session, ck, next_block, batch_end)
                 else:
                     # Process a small batch to avoid long transactions
                     try:
@@ -954,10 +1352,7 @@ def _watcher_loop(app, stop_event: threading.Event, poll_interval: float = 3.0):
                     except Exception:
                         pass
                     batch_end = min(head, next_block + 50)
-                    for bn in range(next_block, batch_end + 1):
-                        _ingest_block(hv, bn)
-                        ck.last_block = bn
-                    db.session.commit()
+                    _ingest_batch(hv, session, ck, next_block, batch_end)
                     # After processing in single mode, sleep close to block interval
                     try:
                         sleep_single = current_app.config.get(
@@ -978,8 +1373,14 @@ def _watcher_loop(app, stop_event: threading.Event, poll_interval: float = 3.0):
                     pass
                 time.sleep(2.0)
             finally:
+                # Roll back anything left open and release the connection
+                try:
+                    session.close()
+                except Exception:
+                    pass
                 # brief pause between batches
                 time.sleep(0.05)
+        session.close()
 
 
 _watcher_stop_event = threading.Event()
@@ -1014,26 +1415,6 @@ def start_block_watcher(app=None):
     _watcher_thread.start()
 
 
-_initialized = False
-
-
-def _ensure_initialized(app=None):
-    global _initialized
-    if _initialized:
-        return
-    # Prefer the provided app; otherwise use current_app
-    ctx_app = app
-    if ctx_app is None:
-        try:
-            ctx_app = current_app._get_current_object()
-        except Exception:
-            return
-    with ctx_app.app_context():
-        db.create_all()
-    start_block_watcher(ctx_app)
-    _initialized = True
-
-
 def stop_block_watcher(timeout: float = 2.0):
     """Signal the watcher to stop and wait briefly for it to exit."""
     global _watcher_thread
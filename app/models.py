@@ -1,7 +1,18 @@
+from contextlib import contextmanager
+
+from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect, select
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.schema import CreateIndex, CreateTable
 
 db = SQLAlchemy()
 
+# JSON documents: native JSONB on Postgres, JSON-encoded TEXT elsewhere
+JSONDocument = db.JSON(none_as_null=True).with_variant(
+    JSONB(none_as_null=True), "postgresql"
+)
+
 
 class Message(db.Model):
     __tablename__ = "messages"
@@ -9,13 +20,66 @@ class Message(db.Model):
     trx_id = db.Column(db.String(64), unique=True, nullable=False)
     block_num = db.Column(db.Integer, nullable=False)
     timestamp = db.Column(db.DateTime, index=True, nullable=False)
-    author = db.Column(db.String(32), index=True, nullable=False)
+    author = db.Column(db.String(32), nullable=False)
     type = db.Column(db.String(16), nullable=False, default="post")
     content = db.Column(db.Text, nullable=False)
-    mentions = db.Column(db.Text, nullable=True)  # JSON string
-    tags = db.Column(db.Text, nullable=True)  # JSON string
+    mentions = db.Column(JSONDocument, nullable=True)  # list of usernames
+    tags = db.Column(JSONDocument, nullable=True)  # list of tags
     reply_to = db.Column(db.String(64), nullable=True)
-    raw_json = db.Column(db.Text, nullable=True)
+    # Full op body for audit/debugging; never serialized by the API, so it is
+    # deferred and only loaded (and JSON-decoded) when accessed explicitly
+    raw_json = db.deferred(db.Column(JSONDocument, nullable=True))
+    # Sanitized HTML rendered once at ingest (NULL for rows not yet backfilled)
+    html = db.Column(db.Text, nullable=True)
+
+    __table_args__ = (
+        # Following/profile timelines: author filter + timestamp ordering (read
+        # backwards for DESC). Also serves plain author lookups, so there is no
+        # separate single-column author index.
+        db.Index("ix_messages_author_timestamp", "author", "timestamp"),
+        # Thread view: replies to a post, oldest first
+        db.Index("ix_messages_reply_to_timestamp", "reply_to", "timestamp"),
+    )
+
+
+class MessageMention(db.Model):
+    __tablename__ = "message_mentions"
+    # One row per (message, mentioned username); mirrors Message.mentions
+    message_id = db.Column(
+        db.Integer,
+        db.ForeignKey("messages.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    username = db.Column(db.String(32), primary_key=True)
+    # Copy of messages.timestamp (messages are immutable) so "mentioning X,
+    # newest first" reads one index range without sorting
+    timestamp = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.Index(
+            "ix_message_mentions_username_timestamp",
+            "username",
+            "timestamp",
+            "message_id",
+        ),
+    )
+
+
+class MessageTag(db.Model):
+    __tablename__ = "message_tags"
+    # One row per (message, tag); mirrors Message.tags
+    message_id = db.Column(
+        db.Integer,
+        db.ForeignKey("messages.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    tag = db.Column(db.String(32), primary_key=True)
+    # Copy of messages.timestamp so "tagged X, newest first" needs no sort
+    timestamp = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.Index("ix_message_tags_tag_timestamp", "tag", "timestamp", "message_id"),
+    )
 
 
 class Checkpoint(db.Model):
@@ -29,12 +93,17 @@ class MentionState(db.Model):
     username = db.Column(db.String(32), primary_key=True)
     last_seen = db.Column(db.DateTime, nullable=True, index=True)
 
+    # last_seen is rewritten in place on every "mark seen"
+    __table_args__ = ({"info": {"fillfactor": 90}},)
+
 
 class ModerationState(db.Model):
     __tablename__ = "moderation_state"
     username = db.Column(db.String(32), primary_key=True)
     last_seen = db.Column(db.DateTime, nullable=True, index=True)
 
+    __table_args__ = ({"info": {"fillfactor": 90}},)
+
 
 class Moderation(db.Model):
     __tablename__ = "moderation"
@@ -47,11 +116,18 @@ class Moderation(db.Model):
     mod_reason = db.Column(db.Text, nullable=True)
     mod_at = db.Column(db.DateTime, nullable=True, index=True)
 
+    __table_args__ = (
+        # Timeline "hidden posts" subquery: index-only seek instead of a scan
+        db.Index("ix_moderation_visibility_trx", "visibility", "trx_id"),
+        # Flipped between public/hidden in place by moderators
+        {"info": {"fillfactor": 90}},
+    )
+
 
 class ModerationAction(db.Model):
     __tablename__ = "moderation_actions"
     id = db.Column(db.Integer, primary_key=True)
-    trx_id = db.Column(db.String(64), index=True, nullable=False)
+    trx_id = db.Column(db.String(64), nullable=False)
     moderator = db.Column(db.String(32), index=True, nullable=False)
     action = db.Column(db.String(16), nullable=False)  # hide|unhide
     reason = db.Column(db.Text, nullable=True)
@@ -61,6 +137,16 @@ class ModerationAction(db.Model):
     sig_pubkey = db.Column(db.String(64), nullable=True)
     sig_value = db.Column(db.Text, nullable=True)
 
+    __table_args__ = (
+        # Last-unhide cutoff and hide approvals since cutoff, per trx_id
+        db.Index(
+            "ix_moderation_actions_trx_action_created",
+            "trx_id",
+            "action",
+            "created_at",
+        ),
+    )
+
 
 class Appreciation(db.Model):
     __tablename__ = "appreciations"
@@ -72,3 +158,313 @@ class Appreciation(db.Model):
     __table_args__ = (
         db.UniqueConstraint("trx_id", "username", name="uq_appreciation_trx_user"),
     )
+
+
+# Applied to every new SQLite connection: WAL lets request threads keep reading
+# while the watcher writes, and NORMAL sync drops the fsync per commit (still
+# durable across application crashes in WAL mode).
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",  # ~16 MB page cache per connection
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+)
+
+
+def set_sqlite_pragmas(dbapi_conn, _connection_record):
+    """Engine "connect" listener applying SQLITE_PRAGMAS."""
+    cur = dbapi_conn.cursor()
+    try:
+        for pragma in SQLITE_PRAGMAS:
+            cur.execute(pragma)
+    finally:
+        cur.close()
+
+
+# Indexes superseded by a composite index with the same leading column; dropped
+# from existing databases so ingest stops maintaining them.
+_RETIRED_INDEXES = {
+    "messages": ("ix_messages_author",),
+    "moderation_actions": ("ix_moderation_actions_trx_id",),
+}
+
+# Association tables filled from the messages JSON column of the same name
+# when they are first created on a database that already holds messages
+_TERM_COLUMNS = {
+    "message_mentions": ("mentions", "username"),
+    "message_tags": ("tags", "tag"),
+}
+
+# Messages read per batch when backfilling the association tables
+_BACKFILL_BATCH = 10000
+
+# Database URLs already reconciled by ensure_schema() in this process
+_schema_ready: set[str] = set()
+
+# pg_advisory_lock key held while a process reconciles the schema (Postgres)
+_SCHEMA_LOCK_KEY = 0x6869766D  # "hivm"
+
+
+def ensure_schema():
+    """Create any missing tables in a single transaction.
+
+    Must be called inside an application context. This is the only place the
+    schema is bootstrapped; callers should not issue db.create_all() themselves.
+    Repeat calls for the same database (extra create_app() instances, scripts,
+    the watcher) return immediately instead of re-inspecting and recompiling DDL.
+    """
+    url = db.engine.url
+    key = url.render_as_string(hide_password=False)
+    if key in _schema_ready:
+        return
+    with _schema_lock():
+        _ensure_schema()
+    # In-memory SQLite is a new, empty database per engine; never skip those
+    if url.database not in (None, "", ":memory:"):
+        _schema_ready.add(key)
+
+
+@contextmanager
+def _schema_lock():
+    """Serialize schema work across processes with a Postgres advisory lock.
+
+    Every worker runs ensure_schema() at startup; without the lock two of them
+    could build (or clean up after) the same concurrent index at once. The
+    lock is session-level, so it is held on its own AUTOCOMMIT connection
+    across the schema transaction and the concurrent index builds.
+    """
+    if db.engine.dialect.name != "postgresql":
+        yield
+        return
+    with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql(f"SELECT pg_advisory_lock({_SCHEMA_LOCK_KEY})")
+        try:
+            yield
+        finally:
+            conn.exec_driver_sql(f"SELECT pg_advisory_unlock({_SCHEMA_LOCK_KEY})")
+
+
+def _ensure_schema():
+    concurrent = []
+    with db.engine.begin() as conn:
+        if conn.dialect.name == "postgresql" and current_app.config.get("FAST_DDL"):
+            # Transaction-scoped: only this DDL commit skips waiting on the WAL flush
+            conn.exec_driver_sql("SET LOCAL synchronous_commit = off")
+        # One inspector (and its per-table reflection cache) for every probe below
+        insp = inspect(conn)
+        if not insp.get_table_names():
+            # Fresh database: emit the DDL straight from the model metadata with
+            # no per-table existence checks and nothing to reconcile afterwards.
+            if conn.dialect.name == "postgresql":
+                _create_all_batched(conn)
+            else:
+                db.metadata.create_all(conn, checkfirst=False)
+        else:
+            concurrent = _upgrade_existing(conn, insp)
+        if conn.dialect.name == "postgresql":
+            _apply_fillfactor(conn)
+    if concurrent:
+        _create_indexes_concurrently(concurrent)
+
+
+def _create_all_batched(conn):
+    """Send the whole fresh-schema DDL to Postgres in one round trip.
+
+    psycopg2 runs a multi-statement string as a single simple query, so the
+    CREATE TABLE/INDEX statements are not acknowledged one by one.
+    """
+    stmts = []
+    for table in db.metadata.sorted_tables:
+        stmts.append(CreateTable(table))
+        stmts.extend(CreateIndex(index) for index in table.indexes)
+    conn.exec_driver_sql(
+        ";\n".join(str(stmt.compile(dialect=conn.dialect)).strip() for stmt in stmts)
+    )
+
+
+def _upgrade_existing(conn, insp) -> list:
+    """Bring an existing database up to the models.
+
+    Returns the missing indexes on pre-existing Postgres tables; those are
+    built afterwards with CREATE INDEX CONCURRENTLY so reads and ingest keep
+    going while a large table is indexed.
+    """
+    postgres = conn.dialect.name == "postgresql"
+    existing_tables = set(insp.get_table_names())
+    db.metadata.create_all(conn)
+    # create_all() skips tables that already exist, including indexes added
+    # to their models later on; create those individually.
+    _add_missing_columns(conn, insp)
+    concurrent = []
+    quote = conn.dialect.identifier_preparer.quote
+    for table in db.metadata.sorted_tables:
+        names = _existing_index_names(insp, table.name)
+        for name in _RETIRED_INDEXES.get(table.name, ()):
+            if name in names:
+                conn.exec_driver_sql(f"DROP INDEX {quote(name)}")
+        for index in table.indexes:
+            if index.name in names:
+                continue
+            if postgres and table.name in existing_tables:
+                concurrent.append(index)
+            else:
+                index.create(conn)
+    if postgres:
+        _convert_text_json_columns(conn, insp)
+    # After the JSONB conversion so the JSON columns read back as lists
+    if "messages" in existing_tables:
+        _backfill_terms(conn, [t for t in _TERM_COLUMNS if t not in existing_tables])
+    return concurrent
+
+
+def _create_indexes_concurrently(indexes):
+    """CREATE INDEX CONCURRENTLY each index outside of any transaction (Postgres).
+
+    IF NOT EXISTS makes a build that another process already finished a no-op.
+    A failed concurrent build leaves an INVALID index behind; only then is it
+    dropped, so the next start retries instead of treating it as present.
+    """
+    quote = db.engine.dialect.identifier_preparer.quote
+    with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for index in indexes:
+            pg_opts = index.dialect_options["postgresql"]
+            pg_opts["concurrently"] = True
+            try:
+                conn.execute(CreateIndex(index, if_not_exists=True))
+            except Exception:
+                current_app.logger.exception(
+                    "[schema] concurrent build of index %s failed", index.name
+                )
+                if _index_is_invalid(conn, index.name):
+                    conn.exec_driver_sql(
+                        f"DROP INDEX CONCURRENTLY IF EXISTS {quote(index.name)}"
+                    )
+            finally:
+                pg_opts["concurrently"] = False
+
+
+def _index_is_invalid(conn, name: str) -> bool:
+    """True when index `name` exists but is marked INVALID in pg_index."""
+    return bool(
+        conn.exec_driver_sql(
+            "SELECT NOT i.indisvalid FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid "
+            "JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE c.relname = %(name)s AND n.nspname = current_schema()",
+            {"name": name},
+        ).scalar()
+    )
+
+
+def _existing_index_names(insp, table_name: str) -> set[str]:
+    return {ix["name"] for ix in insp.get_indexes(table_name)}
+
+
+def _existing_columns(insp, table_name: str) -> dict:
+    return {c["name"]: c["type"] for c in insp.get_columns(table_name)}
+
+
+def _add_missing_columns(conn, insp):
+    """Add columns introduced after a table was first created.
+
+    Uses plain ALTER TABLE ... ADD COLUMN, which SQLite applies in place without
+    recreating the table. Foreign key constraints are never added here (SQLite
+    would need a full table rebuild), and NOT NULL columns are only added when
+    they carry a server default.
+    """
+    compiler = conn.dialect.ddl_compiler(conn.dialect, None)
+    quote = conn.dialect.identifier_preparer.quote
+    for table in db.metadata.sorted_tables:
+        existing = _existing_columns(insp, table.name)
+        for col in table.columns:
+            if col.name in existing:
+                continue
+            if not col.nullable and col.server_default is None:
+                continue
+            conn.exec_driver_sql(
+                f"ALTER TABLE {quote(table.name)} "
+                f"ADD COLUMN {compiler.get_column_specification(col)}"
+            )
+
+
+def _backfill_terms(conn, table_names):
+    """Fill newly created mention/tag association tables from messages JSON.
+
+    Without this, an upgraded database would serve empty mentions, tag feeds
+    and trending until scripts/backfill_mentions_tags.py is run by hand.
+    """
+    if not table_names:
+        return
+    from .helpers import _normalize_terms
+
+    messages = Message.__table__
+    json_cols = [messages.c[_TERM_COLUMNS[name][0]] for name in table_names]
+    totals = dict.fromkeys(table_names, 0)
+    last_id = 0
+    while True:
+        batch = conn.execute(
+            select(messages.c.id, messages.c.timestamp, *json_cols)
+            .where(messages.c.id > last_id)
+            .order_by(messages.c.id)
+            .limit(_BACKFILL_BATCH)
+        ).all()
+        if not batch:
+            break
+        last_id = batch[-1][0]
+        for i, name in enumerate(table_names):
+            term_col = _TERM_COLUMNS[name][1]
+            rows = [
+                {"message_id": row[0], term_col: term, "timestamp": row[1]}
+                for row in batch
+                for term in _normalize_terms(row[2 + i])
+            ]
+            if rows:
+                conn.execute(db.metadata.tables[name].insert(), rows)
+                totals[name] += len(rows)
+    for name, count in totals.items():
+        current_app.logger.info("[schema] backfilled %s rows into %s", count, name)
+
+
+def _convert_text_json_columns(conn, insp):
+    """Convert legacy TEXT columns holding JSON to JSONB in place (Postgres)."""
+    quote = conn.dialect.identifier_preparer.quote
+    for table in db.metadata.sorted_tables:
+        json_cols = [c.name for c in table.columns if isinstance(c.type, db.JSON)]
+        if not json_cols:
+            continue
+        existing = _existing_columns(insp, table.name)
+        for name in json_cols:
+            if isinstance(existing.get(name), db.Text):
+                col = quote(name)
+                conn.exec_driver_sql(
+                    f"ALTER TABLE {quote(table.name)} ALTER COLUMN {col} "
+                    f"TYPE JSONB USING NULLIF({col}, '')::jsonb"
+                )
+
+
+def _apply_fillfactor(conn):
+    """Set the FILLFACTOR declared in a table's info on Postgres when it differs.
+
+    Tables whose rows are updated in place keep free space on each page so the
+    updates stay heap-only (HOT) instead of touching every index.
+    """
+    wanted = {
+        t.name: int(t.info["fillfactor"])
+        for t in db.metadata.sorted_tables
+        if t.info.get("fillfactor")
+    }
+    if not wanted:
+        return
+    rows = conn.exec_driver_sql(
+        "SELECT c.relname, c.reloptions FROM pg_class c "
+        "JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE n.nspname = current_schema() AND c.relkind = 'r'"
+    ).all()
+    current = {name: opts or [] for name, opts in rows}
+    quote = conn.dialect.identifier_preparer.quote
+    for name, fillfactor in wanted.items():
+        if name in current and f"fillfactor={fillfactor}" not in current[name]:
+            conn.exec_driver_sql(
+                f"ALTER TABLE {quote(name)} SET (fillfactor = {fillfactor})"
+            )
@@ -336,7 +336,7 @@ document.addEventListener("DOMContentLoaded", () => {
         feedContainer.appendChild(card);
       }
       if (items.length > 0) {
-        cursor = items[items.length - 1].timestamp; // paginate by timestamp
+        cursor = items[items.length - 1].cursor || items[items.length - 1].timestamp; // keyset cursor (timestamp + id)
         loadMoreBtn.disabled = false;
       } else {
         loadMoreBtn.disabled = true;
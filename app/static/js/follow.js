@@ -37,6 +37,12 @@ document.addEventListener('DOMContentLoaded', () => {
       window.hive_keychain.requestBroadcast(follower, operations, 'Posting', function (response) {
         btn.disabled = false;
         if (response && response.success) {
+          // Keep the server's cached following list in step with the broadcast
+          fetch('/api/v1/following', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json', 'X-CSRF-Token': window.getCsrfToken() },
+            body: JSON.stringify({ target: target, action: action })
+          }).catch(() => {});
           if (action === 'follow') {
             btn.textContent = 'Unfollow';
             btn.setAttribute('data-action', 'unfollow');
@@ -58,7 +58,7 @@ document.addEventListener('DOMContentLoaded', () => {
         tbody.appendChild(tr);
       }
       if (items.length) {
-        cursor = items[items.length - 1].timestamp;
+        cursor = items[items.length - 1].cursor || items[items.length - 1].timestamp;
         loadMoreBtn.disabled = false;
       }
     } catch (e) {
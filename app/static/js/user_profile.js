@@ -141,7 +141,7 @@ document.addEventListener('DOMContentLoaded', () => {
         container.appendChild(card);
       }
       if (items.length > 0) {
-        cursor = items[items.length - 1].timestamp;
+        cursor = items[items.length - 1].cursor || items[items.length - 1].timestamp;
         loadMoreBtn.disabled = false;
       } else {
         loadMoreBtn.disabled = true;
@@ -1,18 +1,24 @@
-import json
 import os
 
 from flask import (
     Blueprint,
     abort,
+    current_app,
     redirect,
     render_template,
     session,
     url_for,
 )
-from nectar.account import Account
 
-from .helpers import _get_following_usernames, markdown_render
-from .models import Message, Moderation, Appreciation, db
+from .helpers import (
+    _MESSAGE_COLS,
+    _get_following_usernames,
+    _get_profile_meta,
+    _heart_maps,
+    _not_hidden,
+    message_html,
+)
+from .models import Message, Moderation, db
 
 ui_bp = Blueprint("ui", __name__)
 
@@ -58,16 +64,7 @@ def public_profile(username: str):
     uname = (username or "").strip()
     if not uname:
         return redirect(url_for("ui.feed"))
-    account = Account(uname)
-    meta = account.get("posting_json_metadata") or account.get("json_metadata") or {}
-    if isinstance(meta, str):
-        try:
-            meta = json.loads(meta)
-        except Exception:
-            meta = {}
-    prof = meta.get("profile") if isinstance(meta, dict) else {}
-    if not isinstance(prof, dict):
-        prof = {}
+    meta, prof = _get_profile_meta(uname)
     # Follow state
     is_following = False
     is_self = False
@@ -96,16 +93,14 @@ def post_page(trx_id: str):
     if not trx_id:
         return redirect(url_for("ui.index"))
     # Server-render the post and its replies as a baseline; client JS can enhance
-    m = Message.query.filter_by(trx_id=trx_id).first()
+    m = db.session.query(*_MESSAGE_COLS).filter(Message.trx_id == trx_id).first()
     if not m:
         return render_template("errors/404.html"), 404
     # Moderation logic
-    mod = Moderation.query.filter_by(trx_id=trx_id).first()
+    mod = db.session.get(Moderation, trx_id)
     hidden = bool(mod and mod.visibility == "hidden")
     is_mod = session.get("username", "").lower() in (
-        os.environ.get("HIVE_MICRO_MODERATORS", "").lower().split(",")
-        if os.environ.get("HIVE_MICRO_MODERATORS")
-        else []
+        current_app.config.get("MODERATORS") or []
     )
     if hidden and not is_mod:
         item = {
@@ -126,13 +121,16 @@ def post_page(trx_id: str):
         "author": m.author,
         "type": m.type,
         "content": m.content,
-        "html": markdown_render(m.content),
-        "mentions": json.loads(m.mentions) if m.mentions else [],
-        "tags": json.loads(m.tags) if m.tags else [],
+        "html": message_html(m),
+        "mentions": m.mentions or [],
+        "tags": m.tags or [],
         "reply_to": m.reply_to,
     }
     reps = (
-        Message.query.filter_by(reply_to=trx_id).order_by(Message.timestamp.asc()).all()
+        db.session.query(*_MESSAGE_COLS)
+        .filter(Message.reply_to == trx_id, _not_hidden())
+        .order_by(Message.timestamp.asc())
+        .all()
     )
     replies = [
         {
@@ -142,40 +140,18 @@ def post_page(trx_id: str):
             "author": r.author,
             "type": r.type,
             "content": r.content,
-            "html": markdown_render(r.content),
-            "mentions": json.loads(r.mentions) if r.mentions else [],
-            "tags": json.loads(r.tags) if r.tags else [],
+            "html": message_html(r),
+            "mentions": r.mentions or [],
+            "tags": r.tags or [],
             "reply_to": r.reply_to,
         }
         for r in reps
-        if not (
-            Moderation.query.filter_by(trx_id=r.trx_id).first()
-            and Moderation.query.filter_by(trx_id=r.trx_id).first().visibility
-            == "hidden"
-        )
     ]
 
     # Heart count aggregation for main post and replies
-    heart_ids = [m.trx_id] + [r["trx_id"] for r in replies]
-    counts_map = {}
-    viewer_hearted_map = {}
-    if heart_ids:
-        rows = (
-            db.session.query(Appreciation.trx_id, db.func.count(Appreciation.id))
-            .filter(Appreciation.trx_id.in_(heart_ids))
-            .group_by(Appreciation.trx_id)
-            .all()
-        )
-        counts_map = {trx: cnt for trx, cnt in rows}
-        if "username" in session:
-            viewer = session["username"].lower()
-            you_rows = (
-                db.session.query(Appreciation.trx_id)
-                .filter(Appreciation.trx_id.in_(heart_ids))
-                .filter(Appreciation.username == viewer)
-                .all()
-            )
-            viewer_hearted_map = {r[0] for r in you_rows}
+    counts_map, viewer_hearted_map = _heart_maps(
+        [m.trx_id] + [r["trx_id"] for r in replies]
+    )
 
     # Add heart data to main item
     item["hearts"] = int(counts_map.get(m.trx_id, 0))
@@ -202,8 +178,6 @@ def moderation_page():
     if not session.get("username"):
         return redirect(url_for("ui.index"))
     uname = session.get("username", "").lower()
-    from flask import current_app
-
     if uname not in (current_app.config.get("MODERATORS") or []):
         return redirect(url_for("ui.feed"))
     return render_template("pages/mod_dashboard.html")
@@ -240,18 +214,11 @@ def handle_500(error):
 
 if os.environ.get("ENABLE_ERROR_ROUTES", "1") == "1":
 
-    @ui_bp.route("/error/401")
-    def _error_401():
-        abort(401)
-
-    @ui_bp.route("/error/403")
-    def _error_403():
-        abort(403)
-
-    @ui_bp.route("/error/404")
-    def _error_404():
-        abort(404)
-
-    @ui_bp.route("/error/500")
-    def _error_500():
-        raise RuntimeError("Test 500 error page")
+    @ui_bp.route("/error/<int:code>")
+    def _error_preview(code: int):
+        # Preview the error pages: /error/401, /error/403, /error/404, /error/500
+        if not current_app.debug:
+            abort(404)
+        if code == 500:
+            raise RuntimeError("Test 500 error page")
+        abort(code if code in (401, 403) else 404)
@@ -11,6 +11,8 @@ Usage examples:
 
 Environment:
   - HIVE_MICRO_WATCHER: defaults to 1 in this sidecar. Set to 0 to disable.
+  - HIVE_MICRO_SKIP_BLUEPRINTS: defaults to 1 in this sidecar so the web
+    routes (API/UI blueprints) are not imported or registered.
   - All other app env vars (DB, Hive nodes, etc.) are honored via create_app().
 """
 
@@ -26,6 +28,8 @@ from .helpers import stop_block_watcher
 def main():
     # Ensure watcher is enabled for the sidecar
     os.environ.setdefault("HIVE_MICRO_WATCHER", "1")
+    # The sidecar serves no HTTP traffic; skip blueprint setup
+    os.environ.setdefault("HIVE_MICRO_SKIP_BLUEPRINTS", "1")
 
     _app = create_app()
 
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Render and store Message.html for rows ingested before the column existed.
+
+Usage examples:
+  python scripts/backfill_html.py --dry-run
+  python scripts/backfill_html.py --batch-size 1000
+  python scripts/backfill_html.py --force   # re-render every row (renderer changed)
+
+Strategy:
+- Walk messages in primary key order, one batch at a time.
+- Only rows with html IS NULL are rendered unless --force is given.
+- Write each batch back with one executemany UPDATE and commit.
+
+Requires app environment (DB) via create_app().
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+
+# Allow running from repo root
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from dotenv import load_dotenv
+from sqlalchemy import update
+
+from app import create_app
+from app.helpers import _render_html
+from app.models import Message, db
+
+# Load environment variables from a .env file if present (e.g., DATABASE_URL)
+load_dotenv()
+
+
+def backfill(batch_size: int, dry_run: bool, force: bool) -> tuple[int, int]:
+    os.environ.setdefault("HIVE_MICRO_WATCHER", "0")
+    app = create_app()
+    examined = 0
+    rendered = 0
+
+    with app.app_context():
+        last_id = 0
+        while True:
+            q = db.session.query(Message.id, Message.content).filter(
+                Message.id > last_id
+            )
+            if not force:
+                q = q.filter(Message.html.is_(None))
+            batch = q.order_by(Message.id.asc()).limit(batch_size).all()
+            if not batch:
+                break
+            last_id = batch[-1][0]
+            examined += len(batch)
+            rows = [
+                {"id": mid, "html": _render_html(content or "")}
+                for mid, content in batch
+            ]
+            rendered += len(rows)
+            if dry_run:
+                continue
+            db.session.execute(update(Message), rows)
+            db.session.commit()
+            app.logger.info(
+                "[backfill] html up to id=%s: rendered=%s", last_id, rendered
+            )
+
+    return examined, rendered
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Backfill rendered Message.html")
+    ap.add_argument(
+        "--batch-size", type=int, default=1000, help="Messages per batch/commit"
+    )
+    ap.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-render rows that already have html (e.g. after renderer changes)",
+    )
+    ap.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Do not write changes; just count the rows that would be rendered",
+    )
+    args = ap.parse_args()
+
+    examined, rendered = backfill(
+        batch_size=max(1, args.batch_size), dry_run=args.dry_run, force=args.force
+    )
+    print(
+        f"Backfill complete: examined={examined} rendered={rendered} dry_run={args.dry_run}"
+    )
+
+
+if __name__ == "__main__":
+    main()
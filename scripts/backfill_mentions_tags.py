@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Backfill the message_mentions / message_tags association tables from the
+mentions/tags JSON stored on existing messages rows.
+
+Usage examples:
+  python scripts/backfill_mentions_tags.py --dry-run
+  python scripts/backfill_mentions_tags.py --batch-size 10000
+
+Strategy:
+- Walk messages in primary key order, one batch at a time.
+- Skip messages that already have association rows (safe to re-run).
+- Insert the remaining rows with one executemany per table per batch.
+
+Requires app environment (DB) via create_app().
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+
+# Allow running from repo root
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from dotenv import load_dotenv
+from sqlalchemy import insert
+
+from app import create_app
+from app.helpers import _normalize_terms
+from app.models import Message, MessageMention, MessageTag, db
+
+# Load environment variables from a .env file if present (e.g., DATABASE_URL)
+load_dotenv()
+
+
+def backfill(batch_size: int, dry_run: bool) -> tuple[int, int, int]:
+    os.environ.setdefault("HIVE_MICRO_WATCHER", "0")
+    app = create_app()
+    examined = 0
+    mention_rows = 0
+    tag_rows = 0
+
+    with app.app_context():
+        last_id = 0
+        while True:
+            batch = (
+                db.session.query(
+                    Message.id, Message.timestamp, Message.mentions, Message.tags
+                )
+                .filter(Message.id > last_id)
+                .order_by(Message.id.asc())
+                .limit(batch_size)
+                .all()
+            )
+            if not batch:
+                break
+            last_id = batch[-1][0]
+            examined += len(batch)
+            ids = [row[0] for row in batch]
+            done = {
+                r[0]
+                for r in db.session.query(MessageMention.message_id)
+                .filter(MessageMention.message_id.in_(ids))
+                .union(
+                    db.session.query(MessageTag.message_id).filter(
+                        MessageTag.message_id.in_(ids)
+                    )
+                )
+                .all()
+            }
+            mentions = []
+            tags = []
+            for mid, ts, mlist, tlist in batch:
+                if mid in done:
+                    continue
+                mentions.extend(
+                    {"message_id": mid, "username": u, "timestamp": ts}
+                    for u in _normalize_terms(mlist)
+                )
+                tags.extend(
+                    {"message_id": mid, "tag": t, "timestamp": ts}
+                    for t in _normalize_terms(tlist)
+                )
+            mention_rows += len(mentions)
+            tag_rows += len(tags)
+            if dry_run:
+                continue
+            if mentions:
+                db.session.execute(insert(MessageMention), mentions)
+            if tags:
+                db.session.execute(insert(MessageTag), tags)
+            db.session.commit()
+            app.logger.info(
+                "[backfill] up to id=%s: mentions=%s tags=%s",
+                last_id,
+                mention_rows,
+                tag_rows,
+            )
+
+    return examined, mention_rows, tag_rows
+
+
+def main():
+    ap = argparse.ArgumentParser(
+        description="Backfill message_mentions/message_tags from messages JSON"
+    )
+    ap.add_argument(
+        "--batch-size", type=int, default=10000, help="Messages per batch/commit"
+    )
+    ap.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Do not write changes; just count the rows that would be inserted",
+    )
+    args = ap.parse_args()
+
+    examined, mentions, tags = backfill(
+        batch_size=max(1, args.batch_size), dry_run=args.dry_run
+    )
+    print(
+        f"Backfill complete: examined={examined} mentions={mentions} tags={tags} dry_run={args.dry_run}"
+    )
+
+
+if __name__ == "__main__":
+    main()
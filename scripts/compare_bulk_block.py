@@ -33,12 +33,12 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from nectar.block import Blocks
 from nectar.hive import Hive
 
-from app import create_app
+from app import get_hive_nodes
 
 
-def _get_hive(app) -> Hive:
+def _get_hive() -> Hive:
     try:
-        return Hive(node=app.config.get("HIVE_NODES"))
+        return Hive(node=get_hive_nodes())
     except Exception:
         return Hive()
 
@@ -73,131 +73,122 @@ def main():
 
     args = ap.parse_args()
 
-    app = create_app()
-    with app.app_context():
-        hv = _get_hive(app)
-        head = _get_head(hv)
-        start = args.start if args.start is not None else max(1, head - args.count)
-
-        # Collect bulk (Blocks) view
-        blocks_view: Dict[int, Dict[str, Any]] = {}
-        it = Blocks(
-            start,
-            args.count,
-            only_ops=True,
-            ops=["custom_json_operation", "custom_json"],
-            blockchain_instance=hv,
-        )
-        for blk in it:
-            bn = getattr(blk, "block_num", None) or blk.get("block_num")
-            ops_list = []
-            for op in getattr(blk, "operations", []) or []:
-                if not isinstance(op, dict):
+    hv = _get_hive()
+    head = _get_head(hv)
+    start = args.start if args.start is not None else max(1, head - args.count)
+
+    # Collect bulk (Blocks) view
+    blocks_view: Dict[int, Dict[str, Any]] = {}
+    it = Blocks(
+        start,
+        args.count,
+        only_ops=True,
+        ops=["custom_json_operation", "custom_json"],
+        blockchain_instance=hv,
+    )
+    for blk in it:
+        bn = getattr(blk, "block_num", None) or blk.get("block_num")
+        ops_list = []
+        for op in getattr(blk, "operations", []) or []:
+            if not isinstance(op, dict):
+                continue
+            t = op.get("type")
+            v = op.get("value") if isinstance(op, dict) else None
+            if args.app_id and (not isinstance(v, dict) or v.get("id") != args.app_id):
+                continue
+            ops_list.append(
+                {
+                    "type": t,
+                    "id": (v or {}).get("id") if isinstance(v, dict) else None,
+                    # note: Blocks ops typically don't carry transaction_id
+                    "has_txid": bool(isinstance(v, dict) and ("transaction_id" in v)),
+                }
+            )
+        blocks_view[int(bn)] = {
+            "block_num": int(bn),
+            "ops": ops_list,
+            "op_count": len(ops_list),
+        }
+
+    # Collect full RPC view for same blocks
+    full_view: Dict[int, Dict[str, Any]] = {}
+    for bn in range(start, start + args.count):
+        blk = hv.rpc.get_block(bn) or {}
+        txs = blk.get("transactions", []) or []
+        ops_list = []
+        for tx in txs:
+            trx_id = tx.get("transaction_id")
+            for op in tx.get("operations", []) or []:
+                if not isinstance(op, (list, tuple)) or len(op) != 2:
+                    continue
+                t, payload = op
+                if t != "custom_json":
                     continue
-                t = op.get("type")
-                v = op.get("value") if isinstance(op, dict) else None
+                if isinstance(payload, str):
+                    try:
+                        payload = json.loads(payload)
+                    except Exception:
+                        payload = {}
                 if args.app_id and (
-                    not isinstance(v, dict) or v.get("id") != args.app_id
+                    not isinstance(payload, dict) or payload.get("id") != args.app_id
                 ):
                     continue
                 ops_list.append(
                     {
                         "type": t,
-                        "id": (v or {}).get("id") if isinstance(v, dict) else None,
-                        # note: Blocks ops typically don't carry transaction_id
-                        "has_txid": bool(
-                            isinstance(v, dict) and ("transaction_id" in v)
-                        ),
+                        "id": (payload or {}).get("id")
+                        if isinstance(payload, dict)
+                        else None,
+                        "transaction_id": trx_id,
                     }
                 )
-            blocks_view[int(bn)] = {
-                "block_num": int(bn),
-                "ops": ops_list,
-                "op_count": len(ops_list),
-            }
-
-        # Collect full RPC view for same blocks
-        full_view: Dict[int, Dict[str, Any]] = {}
+        full_view[int(bn)] = {
+            "block_num": int(bn),
+            "ops": ops_list,
+            "op_count": len(ops_list),
+        }
+
+    # Output
+    if args.json:
         for bn in range(start, start + args.count):
-            blk = hv.rpc.get_block(bn) or {}
-            txs = blk.get("transactions", []) or []
-            ops_list = []
-            for tx in txs:
-                trx_id = tx.get("transaction_id")
-                for op in tx.get("operations", []) or []:
-                    if not isinstance(op, (list, tuple)) or len(op) != 2:
-                        continue
-                    t, payload = op
-                    if t != "custom_json":
-                        continue
-                    if isinstance(payload, str):
-                        try:
-                            payload = json.loads(payload)
-                        except Exception:
-                            payload = {}
-                    if args.app_id and (
-                        not isinstance(payload, dict)
-                        or payload.get("id") != args.app_id
-                    ):
-                        continue
-                    ops_list.append(
-                        {
-                            "type": t,
-                            "id": (payload or {}).get("id")
-                            if isinstance(payload, dict)
-                            else None,
-                            "transaction_id": trx_id,
-                        }
-                    )
-            full_view[int(bn)] = {
-                "block_num": int(bn),
-                "ops": ops_list,
-                "op_count": len(ops_list),
-            }
-
-        # Output
-        if args.json:
-            for bn in range(start, start + args.count):
-                print(
-                    json.dumps(
-                        {
-                            "block": bn,
-                            "blocks_iter": blocks_view.get(bn, {}),
-                            "full_rpc": full_view.get(bn, {}),
-                            "counts": {
-                                "blocks_iter": blocks_view.get(bn, {}).get(
-                                    "op_count", 0
-                                ),
-                                "full_rpc": full_view.get(bn, {}).get("op_count", 0),
-                            },
+            print(
+                json.dumps(
+                    {
+                        "block": bn,
+                        "blocks_iter": blocks_view.get(bn, {}),
+                        "full_rpc": full_view.get(bn, {}),
+                        "counts": {
+                            "blocks_iter": blocks_view.get(bn, {}).get("op_count", 0),
+                            "full_rpc": full_view.get(bn, {}).get("op_count", 0),
                         },
-                        ensure_ascii=False,
-                    )
+                    },
+                    ensure_ascii=False,
                 )
-            return
-
-        print(f"Comparing blocks {start}..{start + args.count - 1}")
-        for bn in range(start, start + args.count):
-            b = blocks_view.get(bn, {"op_count": 0})
-            f = full_view.get(bn, {"op_count": 0})
-            print(
-                f"block {bn}: blocks_iter_ops={b.get('op_count')} full_rpc_ops={f.get('op_count')}"
             )
-            # Show a few sample ops from each
-            bi = (b.get("ops") or [])[:5]
-            fr = (f.get("ops") or [])[:5]
-            if bi:
-                print("  blocks_iter ops (first 5):")
-                for o in bi:
-                    print(
-                        f"    - type={o.get('type')} id={o.get('id')} has_txid={o.get('has_txid')}"
-                    )
-            if fr:
-                print("  full_rpc ops (first 5):")
-                for o in fr:
-                    print(
-                        f"    - type={o.get('type')} id={o.get('id')} txid={o.get('transaction_id')}"
-                    )
+        return
+
+    print(f"Comparing blocks {start}..{start + args.count - 1}")
+    for bn in range(start, start + args.count):
+        b = blocks_view.get(bn, {"op_count": 0})
+        f = full_view.get(bn, {"op_count": 0})
+        print(
+            f"block {bn}: blocks_iter_ops={b.get('op_count')} full_rpc_ops={f.get('op_count')}"
+        )
+        # Show a few sample ops from each
+        bi = (b.get("ops") or [])[:5]
+        fr = (f.get("ops") or [])[:5]
+        if bi:
+            print("  blocks_iter ops (first 5):")
+            for o in bi:
+                print(
+                    f"    - type={o.get('type')} id={o.get('id')} has_txid={o.get('has_txid')}"
+                )
+        if fr:
+            print("  full_rpc ops (first 5):")
+            for o in fr:
+                print(
+                    f"    - type={o.get('type')} id={o.get('id')} txid={o.get('transaction_id')}"
+                )
 
 
 if __name__ == "__main__":
@@ -31,12 +31,12 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from nectar.block import Blocks
 from nectar.hive import Hive
 
-from app import create_app
+from app import get_hive_nodes
 
 
-def _get_hive(app) -> Hive:
+def _get_hive() -> Hive:
     try:
-        return Hive(node=app.config.get("HIVE_NODES"))
+        return Hive(node=get_hive_nodes())
     except Exception:
         return Hive()
 
@@ -164,49 +164,43 @@ def main():
 
     args = ap.parse_args()
 
-    app = create_app()
-    with app.app_context():
-        hv = _get_hive(app)
-        head = _get_head(hv)
-        start = args.start if args.start is not None else max(1, head - args.count)
-        # Collect
-        blocks_only = collect_blocks_only_ops(hv, start, args.count, args.app_id)
-        full_blocks = collect_full_blocks(hv, start, args.count, args.app_id)
+    hv = _get_hive()
+    head = _get_head(hv)
+    start = args.start if args.start is not None else max(1, head - args.count)
+    # Collect
+    blocks_only = collect_blocks_only_ops(hv, start, args.count, args.app_id)
+    full_blocks = collect_full_blocks(hv, start, args.count, args.app_id)
 
-        if args.json:
+    if args.json:
+        print(json.dumps({"mode": "blocks_only", "start": start, "count": args.count}))
+        for b in blocks_only:
+            print(json.dumps(b, ensure_ascii=False))
+        print(json.dumps({"mode": "full_blocks", "start": start, "count": args.count}))
+        for b in full_blocks:
+            print(json.dumps(b, ensure_ascii=False))
+        return
+
+    print(f"Inspecting blocks {start}..{start + args.count - 1}")
+    print("=== Blocks iterator (only_ops) ===")
+    for b in blocks_only:
+        bn = b["block_num"]
+        ops = b["ops"]
+        print(f"block {bn}: ops={len(ops)}")
+        for o in ops[:10]:  # show first 10 per block for brevity
             print(
-                json.dumps({"mode": "blocks_only", "start": start, "count": args.count})
+                f"  - type={o['type']} id={o.get('id')} has_txid={o.get('has_transaction_id')} "
+                f"rpa={o.get('rpa_len')} ra={o.get('ra_len')}"
             )
-            for b in blocks_only:
-                print(json.dumps(b, ensure_ascii=False))
+    print("\n=== Full single-block RPC ===")
+    for b in full_blocks:
+        bn = b["block_num"]
+        ops = b["ops"]
+        print(f"block {bn}: ops={len(ops)}")
+        for o in ops[:10]:
             print(
-                json.dumps({"mode": "full_blocks", "start": start, "count": args.count})
+                f"  - type={o['type']} id={o.get('id')} txid={o.get('transaction_id')} tx_idx={o.get('tx_idx')} op_idx={o.get('op_idx')} "
+                f"rpa={o.get('rpa_len')} ra={o.get('ra_len')}"
             )
-            for b in full_blocks:
-                print(json.dumps(b, ensure_ascii=False))
-            return
-
-        print(f"Inspecting blocks {start}..{start + args.count - 1}")
-        print("=== Blocks iterator (only_ops) ===")
-        for b in blocks_only:
-            bn = b["block_num"]
-            ops = b["ops"]
-            print(f"block {bn}: ops={len(ops)}")
-            for o in ops[:10]:  # show first 10 per block for brevity
-                print(
-                    f"  - type={o['type']} id={o.get('id')} has_txid={o.get('has_transaction_id')} "
-                    f"rpa={o.get('rpa_len')} ra={o.get('ra_len')}"
-                )
-        print("\n=== Full single-block RPC ===")
-        for b in full_blocks:
-            bn = b["block_num"]
-            ops = b["ops"]
-            print(f"block {bn}: ops={len(ops)}")
-            for o in ops[:10]:
-                print(
-                    f"  - type={o['type']} id={o.get('id')} txid={o.get('transaction_id')} tx_idx={o.get('tx_idx')} op_idx={o.get('op_idx')} "
-                    f"rpa={o.get('rpa_len')} ra={o.get('ra_len')}"
-                )
 
 
 if __name__ == "__main__":
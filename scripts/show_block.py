@@ -32,12 +32,12 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from nectar.block import Blocks
 from nectar.hive import Hive
 
-from app import create_app
+from app import get_hive_nodes
 
 
-def _get_hive(app) -> Hive:
+def _get_hive() -> Hive:
     try:
-        return Hive(node=app.config.get("HIVE_NODES"))
+        return Hive(node=get_hive_nodes())
     except Exception:
         return Hive()
 
@@ -63,38 +63,36 @@ def main():
 
     args = ap.parse_args()
 
-    app = create_app()
-    with app.app_context():
-        hv = _get_hive(app)
-
-        block_num: Optional[int] = args.block
-        if block_num is None and args.from_bulk_start is not None:
-            # Enumerate via Blocks and take the first block number it yields
-            it = Blocks(
-                args.from_bulk_start,
-                args.from_bulk_count,
-                only_ops=True,
-                ops=["custom_json_operation", "custom_json"],
-                blockchain_instance=hv,
+    hv = _get_hive()
+
+    block_num: Optional[int] = args.block
+    if block_num is None and args.from_bulk_start is not None:
+        # Enumerate via Blocks and take the first block number it yields
+        it = Blocks(
+            args.from_bulk_start,
+            args.from_bulk_count,
+            only_ops=True,
+            ops=["custom_json_operation", "custom_json"],
+            blockchain_instance=hv,
+        )
+        try:
+            blk = next(iter(it))
+            block_num = getattr(blk, "block_num", None) or blk.get("block_num")
+        except StopIteration:
+            print(
+                "No blocks returned by bulk iterator in the given range",
+                file=sys.stderr,
             )
-            try:
-                blk = next(iter(it))
-                block_num = getattr(blk, "block_num", None) or blk.get("block_num")
-            except StopIteration:
-                print(
-                    "No blocks returned by bulk iterator in the given range",
-                    file=sys.stderr,
-                )
-                sys.exit(1)
-        if block_num is None:
-            print("You must provide --block or --from-bulk-start", file=sys.stderr)
             sys.exit(1)
-
-        full_block: Dict[str, Any] = hv.rpc.get_block(block_num) or {}
-        if args.compact:
-            print(json.dumps(full_block, ensure_ascii=False))
-        else:
-            print(json.dumps(full_block, ensure_ascii=False, indent=2, sort_keys=True))
+    if block_num is None:
+        print("You must provide --block or --from-bulk-start", file=sys.stderr)
+        sys.exit(1)
+
+    full_block: Dict[str, Any] = hv.rpc.get_block(block_num) or {}
+    if args.compact:
+        print(json.dumps(full_block, ensure_ascii=False))
+    else:
+        print(json.dumps(full_block, ensure_ascii=False, indent=2, sort_keys=True))
 
 
 if __name__ == "__main__":
@@ -25,12 +25,12 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from nectar.block import Blocks
 from nectar.hive import Hive
 
-from app import create_app
+from app import get_hive_nodes
 
 
-def _get_hive(app) -> Hive:
+def _get_hive() -> Hive:
     try:
-        return Hive(node=app.config.get("HIVE_NODES"))
+        return Hive(node=get_hive_nodes())
     except Exception:
         return Hive()
 
@@ -79,42 +79,40 @@ def main():
 
     args = ap.parse_args()
 
-    app = create_app()
-    with app.app_context():
-        hv = _get_hive(app)
+    hv = _get_hive()
 
-        it = Blocks(
-            args.start,
-            args.count,
-            only_ops=True,
-            ops=["custom_json_operation", "custom_json"],
-            blockchain_instance=hv,
-        )
+    it = Blocks(
+        args.start,
+        args.count,
+        only_ops=True,
+        ops=["custom_json_operation", "custom_json"],
+        blockchain_instance=hv,
+    )
 
-        for blk in it:
-            bn = getattr(blk, "block_num", None) or (
-                blk.get("block_num") if isinstance(blk, dict) else None
-            )
-            ts = getattr(blk, "timestamp", None)
-            if ts is None and isinstance(blk, dict):
-                ts = blk.get("timestamp")
-            print("==== BULK BLOCK ====")
-            print(f"block_num: {bn}")
-            print(f"timestamp: {ts}")
-            # Print raw operations exactly as provided by the iterator
-            print("operations (raw):")
-            for i, op in enumerate(getattr(blk, "operations", []) or []):
-                try:
-                    print(json.dumps(op, ensure_ascii=False, indent=2))
-                except TypeError:
-                    print(json.dumps(to_jsonable(op), ensure_ascii=False, indent=2))
-            if args.include_ops_in_block and bn is not None:
-                print("==== get_ops_in_block (raw) ====")
-                try:
-                    raw_ops = hv.rpc.get_ops_in_block(int(bn), True) or []
-                    print(json.dumps(raw_ops, ensure_ascii=False, indent=2))
-                except Exception as e:
-                    print(f"get_ops_in_block error: {e}")
+    for blk in it:
+        bn = getattr(blk, "block_num", None) or (
+            blk.get("block_num") if isinstance(blk, dict) else None
+        )
+        ts = getattr(blk, "timestamp", None)
+        if ts is None and isinstance(blk, dict):
+            ts = blk.get("timestamp")
+        print("==== BULK BLOCK ====")
+        print(f"block_num: {bn}")
+        print(f"timestamp: {ts}")
+        # Print raw operations exactly as provided by the iterator
+        print("operations (raw):")
+        for i, op in enumerate(getattr(blk, "operations", []) or []):
+            try:
+                print(json.dumps(op, ensure_ascii=False, indent=2))
+            except TypeError:
+                print(json.dumps(to_jsonable(op), ensure_ascii=False, indent=2))
+        if args.include_ops_in_block and bn is not None:
+            print("==== get_ops_in_block (raw) ====")
+            try:
+                raw_ops = hv.rpc.get_ops_in_block(int(bn), True) or []
+                print(json.dumps(raw_ops, ensure_ascii=False, indent=2))
+            except Exception as e:
+                print(f"get_ops_in_block error: {e}")
 
 
 if __name__ == "__main__":